@@ -0,0 +1,143 @@
+import numpy as np
+from modelenum import *
+
+##############################################################################
+# CLASS:: AssignmentSolver
+#
+# Purpose: Fills a review cycle's closed vacancies jointly. Every
+#          (vacancy, applicant) application becomes one edge of a sparse
+#          bipartite graph with cost
+#
+#            cost = 1 + (1 - score) + movecost / COSTSCALE
+#
+#          where score in [0,1] is the unit-policy weighted match of the
+#          applicant's functional and regional skills to the vacancy, and
+#          movecost is the LocationMatrix PCS cost to the vacancy's unit.
+#          Each vacancy may instead stay unfilled at cost UNFILLED, so an
+#          applicant is only placed where worth it, and in at most one job.
+#
+#          The minimum-cost matching is solved in one call with
+#          scipy.sparse.csgraph.min_weight_full_bipartite_matching (imported
+#          on first use); without scipy a greedy cheapest-edge-first pass is
+#          used instead.
+class AssignmentSolver:
+    COSTSCALE = 100000.0   #PCS dollars equal to one unit of score
+    UNFILLED = 3.0         #cost of leaving a vacancy unfilled this cycle
+
+    def __init__(self, model, exact=True):
+        self.model = model
+        self.exact = exact
+        self.funcs = [f.name for f in Functions]
+        self.rgns = [r.name for r in Regions]
+        self.lastmethod = None
+
+    ############################################################################
+    # Weights: vacancy skill-weight vector over names for a list of required
+    #          skills (enum values or names) and their weights
+    @staticmethod
+    def Weights(names, enum, skills, wghts, policy):
+        w = np.zeros(len(names))
+        skills = list(skills or [])
+        if not skills:
+            return w
+        wghts = list(wghts or [])
+        if len(wghts) != len(skills) or sum(wghts) <= 0:
+            wghts = [1.0] * len(skills)
+        for (s, x) in zip(skills, wghts):
+            name = enum(int(s)).name if not isinstance(s, str) else s
+            if name in names:
+                w[names.index(name)] += x
+        total = w.sum()
+        return w * policy / total if total > 0 else w
+
+    ############################################################################
+    # Edges: (vacancy index, applicant index) arrays for every application,
+    #        plus the distinct applicants; agents already holding an offer
+    #        are left out
+    def Edges(self, vacs):
+        apps, aidx = [], {}
+        vi, ai = [], []
+        for (i, vac) in enumerate(vacs):
+            seen = set()
+            for agt in vac.applicants:
+                uid = agt.getUPI()
+                if uid in seen or agt.joboffer is not None:
+                    continue
+                seen.add(uid)
+                if uid not in aidx:
+                    aidx[uid] = len(apps)
+                    apps.append(agt)
+                vi.append(i)
+                ai.append(aidx[uid])
+        return np.array(vi, dtype=int), np.array(ai, dtype=int), apps
+
+    ############################################################################
+    # Costs: edge costs for the applications (vi, ai)
+    def Costs(self, vacs, apps, vi, ai):
+        #Applicant skills, scaled to [0,1] across this cycle's pool
+        F = np.array([[a.getfuncexp().experience[n] for n in self.funcs] for a in apps], dtype=float)
+        G = np.array([[a.getgeoexp().experience[n] for n in self.rgns] for a in apps], dtype=float)
+        F /= np.where(F.max(axis=0) > 0, F.max(axis=0), 1.0)
+        G /= np.where(G.max(axis=0) > 0, G.max(axis=0), 1.0)
+        WF = np.array([self.Weights(self.funcs, Functions, v.funcexp, v.vacfuncwght, v.unitpolicy["funcexp"])
+                       for v in vacs])
+        WG = np.array([self.Weights(self.rgns, Regions, v.geoexp, v.vacgeowght, v.unitpolicy["geoexp"])
+                       for v in vacs])
+        score = (WF[vi] * F[ai]).sum(axis=1) + (WG[vi] * G[ai]).sum(axis=1)
+        return 1.0 + (1.0 - np.clip(score, 0.0, 1.0)) + self.MoveCosts(vacs, apps, vi, ai) / AssignmentSolver.COSTSCALE
+
+    def MoveCosts(self, vacs, apps, vi, ai):
+        lm = self.model.locmatrix
+        if lm is None:
+            return np.zeros(len(vi))
+        orig = np.array([lm.index.get(a.unit.getlocid(), -1) if a.unit not in (None, "") else -1
+                         for a in apps], dtype=int)
+        dest = np.array([lm.index.get(v.unit.getlocid(), -1) for v in vacs], dtype=int)
+        fams = np.array([a.getfamsize() for a in apps], dtype=float)
+        o, d = orig[ai], dest[vi]
+        known = (o >= 0) & (d >= 0)
+        cost = np.zeros(len(vi))
+        cost[known] = lm.pcscost[o[known], d[known]] + fams[ai][known] * lm.depcost[o[known], d[known]]
+        return cost
+
+    ############################################################################
+    # Match: applicant index (or -1) for each of nv vacancies
+    def Match(self, nv, na, vi, ai, cost):
+        keep = cost < AssignmentSolver.UNFILLED
+        vi, ai, cost = vi[keep], ai[keep], cost[keep]
+        if self.exact:
+            try:
+                from scipy.sparse import coo_matrix
+                from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+            except ImportError:
+                pass
+            else:
+                #One private "unfilled" column per vacancy keeps a full
+                #matching of the vacancies always feasible
+                rows = np.concatenate([vi, np.arange(nv)])
+                cols = np.concatenate([ai, na + np.arange(nv)])
+                vals = np.concatenate([cost, np.full(nv, AssignmentSolver.UNFILLED)])
+                graph = coo_matrix((vals, (rows, cols)), shape=(nv, na + nv)).tocsr()
+                match = min_weight_full_bipartite_matching(graph)[1]
+                self.lastmethod = "exact"
+                return np.where(match < na, match, -1)
+        self.lastmethod = "greedy"
+        match = np.full(nv, -1, dtype=int)
+        taken = np.zeros(na, dtype=bool)
+        for k in np.argsort(cost, kind="stable"):
+            if match[vi[k]] < 0 and not taken[ai[k]]:
+                match[vi[k]] = ai[k]
+                taken[ai[k]] = True
+        return match
+
+    ############################################################################
+    # Solve: {vacid: selected agent or None} for a list of closed
+    #        VacancyAnnouncements
+    def Solve(self, vacs):
+        vi, ai, apps = self.Edges(vacs)
+        match = np.full(len(vacs), -1, dtype=int)
+        self.lastmethod = "no applicants"
+        if len(vi):
+            cost = self.Costs(vacs, apps, vi, ai)
+            match = self.Match(len(vacs), len(apps), vi, ai, cost)
+        return {v.vacid: (apps[m] if m >= 0 else None) for (v, m) in zip(vacs, match)}
@@ -7,6 +7,7 @@
 ##############################################################################
 ##############################################################################
 import datetime as dt
+import numpy as np
 import numpy.random as npr
 import pandas as pd
 from Location import *
@@ -47,6 +48,7 @@ class BaseAgent(Agent):
         
         # Employment related information
         self.status = BaseAgent.AGT_STATUS["unassigned"]
+        self.statusdate = None     #Date the agent retired or was released
         self.joboffer = None
         self.initiative = npr.randint(1,101) / 100 # Likelihood to move
         self.retire_eligible = False
@@ -56,14 +58,17 @@ class BaseAgent(Agent):
         self.unit = "" 
         self.unit_funcexp = FuncSkillSet()
         self.unit_rgnlexp = RgnlSkillSet()
-        self.funcexp = FuncSkillSet()
-        self.geoexp = RgnlSkillSet()
+        self.funcexp = FuncSkillSet(self.ModelDay)
+        self.geoexp = RgnlSkillSet(self.ModelDay)
         self.network = None
         self.personalnet = None
         self.teammembers = []
         
         #records
         self.salhist = {}
+        self.payhist = {}    #date -> (grade, step, locality) from that date
+        self.startdate = model.date
+        self.exitdate = None
         self.lochist = {}
         
     ############################################################################  
@@ -87,6 +92,9 @@ class BaseAgent(Agent):
     def getinitiative(self): return self.initiative
     def getfuncexp(self): return self.funcexp
     def getgeoexp(self): return self.geoexp
+    def getweight(self): return 1
+    def ModelDay(self): return self.model.date.toordinal()
+    def getplns(self): return [self.PLN]
     
     ############################################################################  
     # Network Specific routines
@@ -133,27 +141,41 @@ class BaseAgent(Agent):
         self.geoexp.initrgnl(exp)
         
     ############################################################################  
-    #
+    # UpdateFunctionalExp: Skills in exp grow and all others decay once per
+    #   day from today; values are evaluated lazily when read, so this only
+    #   needs calling when the assignment's skills change.
     def UpdateFunctionalExp(self,exp):
+        rates = {}
         for e in Functions:
-            if e.value in exp:
-                self.funcexp.incSkill(e.name)
-            else:
-                self.funcexp.decSkill(e.name)
+            rates[e.name] = self.funcexp.incrate if e.value in exp else self.funcexp.decrate
+        self.funcexp.SetRates(rates)
         
     ############################################################################  
     #
     def UpdateGeographicExp(self,exp):
+        rates = {}
         for e in Regions:
-            if e.value in exp:
-                self.geoexp.incSkill(e.name)
-            else:
-                self.geoexp.decSkill(e.name)
+            rates[e.name] = self.geoexp.incrate if e.value in exp else self.geoexp.decrate
+        self.geoexp.SetRates(rates)
                 
+    ############################################################################  
+    # getdailysalary: salary in effect on each of ndays days from first;
+    #                 salhist keys are the dates each salary took effect
+    def getdailysalary(self,first,ndays):
+        sal = np.full(ndays, self.salary, dtype=float)
+        dates = list(self.salhist.keys())
+        for i in range(len(dates) - 1, 0, -1):
+            k = (dates[i] - first).days
+            if k <= 0:
+                break
+            sal[:min(k, ndays)] = self.salhist[dates[i - 1]]
+        return sal
+        
     ############################################################################  
     #
     def UpdateSalary(self,sal):
         self.salhist[self.model.date] = sal
+        self.payhist[self.model.date] = (self.grade, self.paystep, self.curloc)
         self.salary = sal
     
     ############################################################################  
@@ -198,19 +220,37 @@ class BaseAgent(Agent):
             
             self.dwell += 1
             self.daysinstep += 1
-            timeinservice = (self.model.date - self.SCD).days / 365
-            age = (self.model.date - self.DoB).days / 365
-            if (timeinservice > 20.0) and (age > 55):
-                self.retire_eligible = True
-                print("\t **** Retirement Eligible ****")
-                self.status = BaseAgent.AGT_STATUS["retired"]
 
             #Calculate time for within grade increase... simplistic
             if self.paystep != self.model.paytable.GetStep(self.paystep, self.daysinstep):
                 print("Employee WGI: ", self.UPI)
+                self.model.num_wgis += self.getweight()
                 self.paystep += 1
                 self.daysinstep = 1
-                self.salary = self.model.paytable.GetSalVal(self.curloc,self.grade,self.paystep)
+                self.UpdateSalary(self.model.paytable.GetSalVal(self.curloc,self.grade,self.paystep))
+            
+            self.CheckRetirement()
+            self.CheckRelease()
+    
+    ############################################################################  
+    #
+    def CheckRetirement(self):
+        timeinservice = (self.model.date - self.SCD).days / 365
+        age = (self.model.date - self.DoB).days / 365
+        if (timeinservice > 20.0) and (age > 55):
+            self.retire_eligible = True
+            print("\t **** Retirement Eligible ****")
+            self.status = BaseAgent.AGT_STATUS["retired"]
+            self.statusdate = self.model.date
+
+    ############################################################################  
+    # CheckRelease: A non-extended employee leaves on the day their dwell
+    #               reaches the unit's limit; the unit removes them when it
+    #               next steps, dated to that day
+    def CheckRelease(self):
+        if self.status == BaseAgent.AGT_STATUS["nonextended"] and self.dwell >= self.unit.DWELL_LIMIT["nonextended"]:
+            self.status = BaseAgent.AGT_STATUS["released"]
+            self.statusdate = self.model.date
 
     ############################################################################  
     #
@@ -13,6 +13,8 @@ class Billet:
         self.key = kwargs["KEY"]
         self.occupant = kwargs["OCC"]
         self.location = kwargs["LOC"]
+        self.table = None    #BilletTable row this billet writes through to
+        self.row = None
         
     def getupn(self): return self.UPN
     def getamsco(self): return self.AMSCO
@@ -24,14 +26,23 @@ class Billet:
     def isKeyPos(self): return self.key
     
     def KeyPos(self,kp): self.key = kp #boolean: True if key pos
-    def Fill(self, occ): self.occupant = occ
-    def Vacate(self): self.occupant = None
+    def Fill(self, occ): 
+        self.occupant = occ
+        if self.table is not None: self.table.Fill(self.row, occ)
+    def Vacate(self): 
+        self.occupant = None
+        if self.table is not None: self.table.Vacate(self.row)
     def Restructure(self,ams,grd,ser):
         self.AMSCO = ams
         self.authgrade = grd
         self.authseries = ser
+        if self.table is not None:
+            self.table.Set(self.row, "ams", ams)
+            self.table.Set(self.row, "agd", grd)
+            self.table.Set(self.row, "ser", ser)
     def MDR(self, to_loc):
         self.location = to_loc
+        if self.table is not None: self.table.Set(self.row, "loc", to_loc)
     def PrettyPrint(self):
         print("\t\tUPN ", self.UPN)
         print("\t\tAMSCO ", self.AMSCO)
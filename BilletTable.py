@@ -0,0 +1,81 @@
+import numpy as np
+##############################################################################
+##############################################################################
+# CLASS:: BilletTable
+#
+# Purpose: Enterprise-wide columnar store of every Billet with an occupancy
+#          bitmap. Billet.Fill/Vacate flip the bitmap, and NewVacancies diffs
+#          it against the previous tick to find newly vacated billets without
+#          scanning unit TDAs.
+#
+class BilletTable:
+    COLUMNS = ["pln", "upn", "ams", "agd", "ser", "loc", "uic", "occupant"]
+
+    def __init__(self, capacity=1024):
+        self.numrows = 0
+        self.index = {}     #(UIC, PLN) -> row; PLNs repeat across units
+        self.cols = {c: np.empty(capacity, dtype=object) for c in BilletTable.COLUMNS}
+        self.occupied = np.zeros(capacity, dtype=bool)
+        self.previous = np.ones(capacity, dtype=bool)   #occupancy at last diff
+
+    def __len__(self): return self.numrows
+
+    ############################################################################
+    # Grow: double the capacity of every column
+    def Grow(self):
+        cap = 2 * len(self.occupied)
+        for c in self.cols:
+            col = np.empty(cap, dtype=object)
+            col[:self.numrows] = self.cols[c][:self.numrows]
+            self.cols[c] = col
+        occ = np.zeros(cap, dtype=bool)
+        occ[:self.numrows] = self.occupied[:self.numrows]
+        prv = np.ones(cap, dtype=bool)
+        prv[:self.numrows] = self.previous[:self.numrows]
+        self.occupied, self.previous = occ, prv
+
+    ############################################################################
+    # Add: append a Billet and bind it to its row. New rows count as
+    #      previously occupied, so a billet added vacant is posted.
+    def Add(self, billet, pln, uic):
+        if self.numrows == len(self.occupied):
+            self.Grow()
+        r = self.numrows
+        self.index[(uic, pln)] = r
+        for (c, v) in [("pln", pln), ("upn", billet.getupn()), ("ams", billet.getamsco()),
+                       ("agd", billet.getgrade()), ("ser", billet.getseries()),
+                       ("loc", billet.getloc()), ("uic", uic), ("occupant", billet.getoccupant())]:
+            self.cols[c][r] = v
+        self.occupied[r] = billet.getoccupant() is not None
+        self.numrows += 1
+        billet.table = self
+        billet.row = r
+        return r
+
+    ############################################################################
+    #
+    def getrow(self, uic, pln): return self.index[(uic, pln)]
+    def getcol(self, c): return self.cols[c][:self.numrows]
+
+    def Set(self, r, col, v): self.cols[col][r] = v
+
+    def Fill(self, r, occ):
+        self.cols["occupant"][r] = occ
+        self.occupied[r] = occ is not None
+
+    def Vacate(self, r):
+        self.cols["occupant"][r] = None
+        self.occupied[r] = False
+
+    ############################################################################
+    # NewVacancies: rows vacated since the last call
+    def NewVacancies(self):
+        n = self.numrows
+        rows = np.flatnonzero(self.previous[:n] & ~self.occupied[:n])
+        self.previous[:n] = self.occupied[:n]
+        return rows
+
+    ############################################################################
+    #
+    def FillRate(self):
+        return self.occupied[:self.numrows].mean() if self.numrows else 0.0
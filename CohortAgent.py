@@ -0,0 +1,97 @@
+import numpy as np
+from BaseAgent import *
+##############################################################################
+##############################################################################
+# CLASS:: CohortAgent
+#
+# Purpose: A weighted record standing in for a group of interchangeable
+#          employees (same unit, locality, grade, step, status, dwell and
+#          skills). The cohort is stepped once for all of its members and is
+#          only split when a stochastic or member-specific event (extension
+#          draw, retirement eligibility) treats members differently.
+#          Per-member identity is kept in compact numpy arrays.
+#
+class CohortAgent(BaseAgent):
+    # tdadata columns that must match for employees to share a cohort; DWL
+    # and TIG are matched by bucket (see Enterprise cohortbucket)
+    COHORT_KEY = ["OCN", "TYP", "SER", "GRD", "STP", "LOC", "FMS", "FEX", "GEX", "DWB", "TGB"]
+
+    def __init__(self,uid,model):
+        super().__init__(uid, model)
+        self.eids = np.array([], dtype=object)
+        self.plns = np.array([], dtype=object)
+        self.lastnames = np.array([], dtype=object)
+        self.scd = np.array([], dtype=np.int64)   #SCD as date ordinals
+        self.dob = np.array([], dtype=np.int64)   #DoB as date ordinals
+        self.weighthist = {}   #date -> weight from that date
+
+    ############################################################################
+    #
+    def getweight(self): return len(self.eids)
+    def getplns(self): return list(self.plns)
+    def geteids(self): return list(self.eids)
+
+    ############################################################################
+    # SetMembers: Replace the member arrays (all the same length)
+    def SetMembers(self, eids, plns, lastnames, scd, dob):
+        self.eids = np.asarray(eids, dtype=object)
+        self.plns = np.asarray(plns, dtype=object)
+        self.lastnames = np.asarray(lastnames, dtype=object)
+        self.scd = np.asarray(scd, dtype=np.int64)
+        self.dob = np.asarray(dob, dtype=np.int64)
+        self.weighthist[self.model.date] = len(self.eids)
+        if len(self.eids):
+            self.lastname = self.lastnames[0]
+            self.PLN = self.plns[0]
+
+    ############################################################################
+    # Split: Move the members selected by mask into a new cohort that shares
+    #        this cohort's current state; returns the new cohort.
+    def Split(self, mask):
+        mask = np.asarray(mask, dtype=bool)
+        new = CohortAgent(self.model.NextCohortID(), self.model)
+        for attr in ["type", "grade", "series", "paystep", "famsize", "salary", "curloc",
+                     "status", "statusdate", "dwell", "daysinstep", "DEROS", "unit", "initiative",
+                     "retire_eligible"]:
+            setattr(new, attr, getattr(self, attr))
+        new.salhist = dict(self.salhist)
+        new.payhist = dict(self.payhist)
+        new.funcexp.CopyFrom(self.funcexp)
+        new.geoexp.CopyFrom(self.geoexp)
+        new.SetMembers(self.eids[mask], self.plns[mask], self.lastnames[mask],
+                       self.scd[mask], self.dob[mask])
+        self.SetMembers(self.eids[~mask], self.plns[~mask], self.lastnames[~mask],
+                        self.scd[~mask], self.dob[~mask])
+
+        #Register the new cohort alongside this one
+        self.model.schedule.add(new)
+        self.unit.roster[new.getUPI()] = new
+        self.model.agt_network.nodes[self.getUPI()]["weight"] = self.getweight()
+        edges = [(n, d.get("weight", 1)) for (n, d) in self.model.agt_network[self.getUPI()].items()
+                 if n != self.getUPI()]
+        self.model.AddNetworkNode(new.getUPI(), edges + [(self.getUPI(), 1.0)],
+                                  object=new, weight=new.getweight())
+        if self.model.forecast is not None:
+            self.model.forecast.Update(self)
+            self.model.forecast.Update(new)
+        return new
+
+    ############################################################################
+    # CheckRetirement: Members become eligible on their own dates, so the
+    #                  eligible members are split off and retired together.
+    def CheckRetirement(self):
+        today = self.model.date.toordinal()
+        elig = ((today - self.scd) / 365 > 20.0) & ((today - self.dob) / 365 > 55)
+        if not elig.any():
+            return
+        print("\t **** Retirement Eligible (%d) ****"%(elig.sum()))
+        ret = self if elig.all() else self.Split(elig)
+        ret.retire_eligible = True
+        ret.status = BaseAgent.AGT_STATUS["retired"]
+        ret.statusdate = self.model.date
+
+    ############################################################################
+    #
+    def PrettyPrint(self):
+        print("Cohort ID: ",self.UPI," weight: ",self.getweight())
+        super().PrettyPrint()
@@ -0,0 +1,259 @@
+import math
+import time
+import datetime as dt
+import numpy as np
+import pandas as pd
+from BaseAgent import *
+from Unit import *
+from CohortAgent import *
+
+##############################################################################
+# RetirementStep: First model step on which BaseAgent.step retires the agent
+#   (time in service > 20 years and age > 55 years, measured in whole days
+#   since the model date, as BaseAgent.step does).
+def RetirementStep(agt, date):
+    if agt.status == BaseAgent.AGT_STATUS["retired"]:
+        return 1
+    k_tis = 20 * 365 + 1 - (date - agt.SCD).days
+    k_age = 55 * 365 + 1 - (date - agt.DoB).days
+    return max(1, k_tis, k_age)
+
+##############################################################################
+# MemberRetirementSteps: RetirementStep for each member of a CohortAgent, from
+#   the member SCD/DoB ordinals (CohortAgent.CheckRetirement). Returns the
+#   distinct steps and the number of members retiring on each.
+def MemberRetirementSteps(agt, date):
+    today = date.toordinal()
+    steps = np.maximum(np.maximum(20 * 365 + 1 - (today - agt.scd), 55 * 365 + 1 - (today - agt.dob)), 1)
+    return np.unique(steps, return_counts=True)
+
+##############################################################################
+# WGIThreshold: Days in step at which PayTable.GetStep advances the step,
+#   found by searching GetStep itself so the rule lives in one place.
+def WGIThreshold(paytable, step, cap=20*365):
+    if paytable.GetStep(step, cap) == step:
+        return None
+    lo, hi = 0, cap
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if paytable.GetStep(step, mid) == step:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+##############################################################################
+# SalarySchedule: [(first step, salary), ...] for an agent over ndays steps,
+#   following the within-grade increases made by BaseAgent.step.
+def SalarySchedule(agt, paytable, ndays):
+    sched = [(0, agt.getsalary())]
+    k, d, step = 0, agt.daysinstep, agt.paystep
+    while True:
+        thr = WGIThreshold(paytable, step)
+        if thr is None:
+            break
+        k = k + max(1, thr - d)
+        if k > ndays:
+            break
+        step += 1
+        d = 1
+        sched.append((k, paytable.GetSalVal(agt.curloc, agt.grade, step)))
+    return sched
+
+##############################################################################
+# CLASS:: MarkovCohort
+#
+# Purpose: Cohort-level semi-Markov model of the Unit.step status machine
+#          (assigned -> extended -> nonextended -> released, plus retirement).
+#          Employees sharing a unit, status, dwell and CONUS/OCONUS flag form
+#          a group whose status distribution over (status, dwell) is
+#          propagated by array shifts; retirement and pay are deterministic
+#          per employee and applied as per-group survivor and payroll
+#          weights. Expected values are exact for the agent model.
+#
+# Status arrays are end-of-step states (index 0 = after LoadData). The
+# "fillrate" and "civpay" records follow Unit.RecordFillRate/RecordCivPay,
+# i.e. record k is taken at the start of Unit.step on step k.
+class MarkovCohort:
+    def __init__(self, model):
+        self.model = model
+        self.basedate = model.date
+        self.uics = list(model.units.keys())
+        self.A = int(math.ceil(Unit.DWELL_LIMIT["assigned"]))
+        self.E = int(math.ceil(Unit.DWELL_LIMIT["extended"]))
+        self.N = int(math.ceil(Unit.DWELL_LIMIT["nonextended"]))
+        self.p = Unit.NONEXT_PROB
+        self.keys = []
+        self.results = {}
+        self.ndays = 0
+
+    ############################################################################
+    # BuildGroups: bucket the rosters into groups and collect per-member
+    #              retirement steps and salary schedules as
+    #              (group, retirement step, schedule, weight); a CohortAgent
+    #              contributes its members, grouped by their own retirement
+    #              steps
+    def BuildGroups(self, ndays):
+        gidx = {}
+        members = []
+        for ui, uic in enumerate(self.uics):
+            unit = self.model.units[uic]
+            for eid in unit.roster:
+                agt = unit.roster[eid]
+                oconus = agt.DEROS is not None
+                s = agt.status
+                d = int(agt.dwell)
+                if s == BaseAgent.AGT_STATUS["extended"]:
+                    d = min(d, self.E - 1)
+                elif s == BaseAgent.AGT_STATUS["nonextended"]:
+                    d = min(d, self.N - 1)
+                elif oconus:
+                    d = min(d, self.A - 1)
+                else:
+                    d = 0
+                key = (ui, oconus, s, d)
+                if key not in gidx:
+                    gidx[key] = len(self.keys)
+                    self.keys.append(key)
+                sched = SalarySchedule(agt, self.model.paytable, ndays)
+                if isinstance(agt, CohortAgent) and s != BaseAgent.AGT_STATUS["retired"]:
+                    for (r, w) in zip(*MemberRetirementSteps(agt, self.basedate)):
+                        members.append((gidx[key], int(r), sched, int(w)))
+                else:
+                    members.append((gidx[key], RetirementStep(agt, self.basedate), sched, agt.getweight()))
+        return members
+
+    ############################################################################
+    # Propagate: run the group status chain ndays steps.
+    #   Returns active/assigned/extended/nonextended/released probabilities,
+    #   each shaped (groups, ndays+1).
+    def Propagate(self, ndays):
+        G = len(self.keys)
+        a = np.zeros((G, self.A + 1))
+        e = np.zeros((G, self.E + 1))
+        n = np.zeros((G, self.N + 1))
+        c = np.zeros(G)
+        rel = np.zeros(G)
+        for g, (ui, oconus, s, d) in enumerate(self.keys):
+            if s == BaseAgent.AGT_STATUS["extended"]:
+                e[g, d] = 1.0
+            elif s == BaseAgent.AGT_STATUS["nonextended"]:
+                n[g, d] = 1.0
+            elif s == BaseAgent.AGT_STATUS["retired"]:
+                c[g] = 1.0    # released by retirement on step 1
+            elif oconus:
+                a[g, d] = 1.0
+            else:
+                c[g] = 1.0
+
+        hist = {k: np.zeros((G, ndays + 1)) for k in ["assigned", "extended", "nonextended", "released"]}
+        for k in range(ndays + 1):
+            if k > 0:
+                #BaseAgent.step: dwell += 1
+                a[:, 1:] = a[:, :-1].copy(); a[:, 0] = 0
+                e[:, 1:] = e[:, :-1].copy(); e[:, 0] = 0
+                n[:, 1:] = n[:, :-1].copy(); n[:, 0] = 0
+                #Unit.step: review each status at its dwell limit
+                toext = a[:, self.A].copy(); a[:, self.A] = 0
+                review = e[:, self.E].copy(); e[:, self.E] = 0
+                torel = n[:, self.N].copy(); n[:, self.N] = 0
+                e[:, 1] += toext + (1 - self.p) * review
+                n[:, self.E] += self.p * review
+                rel += torel
+            hist["assigned"][:, k] = a.sum(axis=1) + c
+            hist["extended"][:, k] = e.sum(axis=1)
+            hist["nonextended"][:, k] = n.sum(axis=1)
+            hist["released"][:, k] = rel
+        hist["active"] = hist["assigned"] + hist["extended"] + hist["nonextended"]
+        return hist
+
+    ############################################################################
+    # Run: expected per-unit status counts, vacancies, fill rate and payroll
+    def Run(self, ndays):
+        self.ndays = ndays
+        self.keys = []
+        members = self.BuildGroups(ndays)
+        G = len(self.keys)
+        U = len(self.uics)
+        K = ndays + 1
+
+        #Survivors (not yet retired) at end of step k, and payroll for the
+        #record taken on step k (roster of step k-1, salaries of step k)
+        surv = np.zeros((G, K + 1))
+        pay = np.zeros((G, K + 1))
+        retstep = np.zeros((G, K + 1))
+        for (g, r, sched, w) in members:
+            surv[g, 0] += w
+            if r <= ndays:
+                surv[g, r] -= w
+                retstep[g, r] += w
+            last = min(r, ndays) + 1
+            for j, (k0, sal) in enumerate(sched):
+                k1 = sched[j + 1][0] if j + 1 < len(sched) else last
+                k1 = min(k1, last)
+                if k0 < k1:
+                    pay[g, k0] += sal * w
+                    pay[g, k1] -= sal * w
+        surv = np.cumsum(surv, axis=1)[:, :K]
+        pay = np.cumsum(pay, axis=1)[:, :K]
+        retstep = retstep[:, :K]
+
+        hist = self.Propagate(ndays)
+        prev = np.concatenate([hist["active"][:, :1], hist["active"][:, :-1]], axis=1)
+        retired = np.cumsum(retstep * prev, axis=1)
+
+        unitof = np.array([key[0] for key in self.keys], dtype=int)
+        def ByUnit(x):
+            out = np.zeros((U, K))
+            np.add.at(out, unitof, x)
+            return out
+
+        res = {}
+        for s in ["assigned", "extended", "nonextended", "released"]:
+            res[s] = ByUnit(surv * hist[s])
+        #Members released before their retirement step stay released
+        prevrel = np.concatenate([hist["released"][:, :1], hist["released"][:, :-1]], axis=1)
+        res["released"] += ByUnit(np.cumsum(retstep * prevrel, axis=1))
+        res["retired"] = ByUnit(retired)
+        res["filled"] = res["assigned"] + res["extended"] + res["nonextended"]
+        nbillets = np.array([len(self.model.units[u].TDA) for u in self.uics], dtype=float)
+        res["vacancies"] = nbillets[:, None] - res["filled"]
+        recfill = np.concatenate([res["filled"][:, :1], res["filled"][:, :-1]], axis=1)
+        res["fillrate"] = recfill / nbillets[:, None]
+        res["civpay"] = ByUnit(prev * pay) / 260
+        self.results = res
+        return res
+
+    ############################################################################
+    # Frame: one measure as a DataFrame indexed by date, one column per unit
+    def Frame(self, measure):
+        dates = [self.basedate + dt.timedelta(days=k) for k in range(self.ndays + 1)]
+        return pd.DataFrame(self.results[measure].T, index=dates, columns=self.uics)
+
+##############################################################################
+# Validate: Compare the cohort model with the mean of reps agent replicates.
+#   Returns max absolute fill-rate error, max relative civ-pay error and the
+#   CPU time of each approach.
+def Validate(basedate, ndays, reps=20, seed=1, **kwargs):
+    from Replication import RunEnterprise
+
+    t0 = time.process_time()
+    base = RunEnterprise(basedate, 0, **kwargs)
+    cohort = MarkovCohort(base)
+    res = cohort.Run(ndays)
+    tcohort = time.process_time() - t0
+
+    t0 = time.process_time()
+    fill = np.zeros_like(res["fillrate"])
+    civ = np.zeros_like(res["civpay"])
+    for r in range(reps):
+        model = RunEnterprise(basedate, ndays, seed + r, **kwargs)
+        for ui, uic in enumerate(cohort.uics):
+            fill[ui] += np.array(model.units[uic].fillrate) / reps
+            civ[ui] += np.array(model.units[uic].civpay) / reps
+    tagents = time.process_time() - t0
+
+    civerr = np.abs(civ - res["civpay"]) / np.maximum(np.abs(civ), 1.0)
+    return {"fillrate_maxerr": float(np.max(np.abs(fill - res["fillrate"]))),
+            "civpay_maxrelerr": float(np.max(civerr)),
+            "cohort_cpu": tcohort, "agent_cpu": tagents, "reps": reps}
@@ -1,12 +1,21 @@
+import os
 import datetime as dt
+import numpy as np
 import pandas as pd
 import networkx as nx
 from BaseAgent import *
 from JobBoard import *
 from Location import *
+from LocationMatrix import *
 from Unit import *
 from Billet import *
+from BilletTable import *
+from CohortAgent import *
 from PayTable import *
+from StagedScheduler import *
+from NetworkAnalytics import *
+from ReorgEvents import *
+from RotationForecast import *
 from mesa import Model, Agent
 from mesa.time import RandomActivation
 
@@ -26,29 +35,61 @@ def ReadNetLayout(file):
     return G, retlay   
 
 class Enterprise(Model):
-    def __init__(self,basedate):
+    def __init__(self,basedate,cohorts=False,cohortbucket=30,cadence=None,jobboard=False,datadir=".",netstats=False,events=None,forecast=False,matching=False):
         super().__init__(1)
         self.date = basedate
+        self.startdate = basedate
+        self.cohorts = cohorts            #Compress interchangeable employees
+        self.cohortbucket = cohortbucket  #Dwell/TIG bucket width in days
+        self.num_cohorts = 0
+        self.datadir = datadir
         self.num_baseagents = 0
+        self.num_wgis = 0
         self.num_locations = 0
         self.locations = {}
+        self.locmatrix = None
         self.schedule = RandomActivation(self)
-        self.paytable = PayTable("2018-general-schedule-pay-rates.csv")
+        self.paytable = PayTable(os.path.join(datadir,"2018-general-schedule-pay-rates.csv"))
         self.units = {}
         self.deadpool = []
-        #
-        #self.jobboard = JobBoard(0,self)
-        #self.schedule.add(self.jobboard)
+        self.billets = BilletTable()
+        self.jobboard = JobBoard(0,self,matching) if jobboard else None
         
         self.agt_network = nx.Graph()
         self.unit_network = nx.DiGraph()
         self.unit_displaypos = None
+        self.netstatsopt = netstats   #Track agt_network cohesion
+        self.netstats = None
+        self.forecastopt = forecast   #Index projected billet openings
+        self.forecast = None
+        
+        #Staged scheduler: each component steps at its own cadence
+        #(daily, business, weekly, monthly); see StagedScheduler.CADENCES
+        #Units only act on dwell limits measured in years and record each
+        #skipped day on catch-up, so they step weekly by default
+        self.cadence = {"agents":"daily", "units":"weekly", "vacancies":"daily", "jobboard":"weekly",
+                        "network":"monthly", "prepost":"weekly"}
+        if cadence is not None:
+            self.cadence.update(cadence)
+        self.stages = StagedScheduler(self)
+        self.events = ReorgEvents(self, events) if events is not None else None
+        if self.events is not None:
+            self.stages.Register("events", self.ApplyEvents, "daily", phase=-1)
+        self.stages.Register("agents", self.StepAgents, self.cadence["agents"], phase=0)
+        self.stages.Register("units", self.StepUnits, self.cadence["units"], phase=1)
+        if self.jobboard is not None:
+            self.stages.Register("vacancies", self.PostVacancies, self.cadence["vacancies"], phase=2)
+            self.stages.Register("jobboard", self.StepJobBoard, self.cadence["jobboard"], phase=3)
+        if self.jobboard is not None and forecast:
+            self.stages.Register("prepost", self.PrePostVacancies, self.cadence["prepost"], phase=2)
+        if netstats:
+            self.stages.Register("network", self.RecordNetworkStats, self.cadence["network"], phase=4)
         
     def LoadData(self):
         
         #Read in locations data
         #--> LOC, GLC, LMS, OPP, OCN, ACT, OPP
-        locs = pd.DataFrame().from_csv("locations.csv").reset_index()
+        locs = pd.DataFrame().from_csv(os.path.join(self.datadir,"locations.csv")).reset_index()
         loc_params = {}
         
         #Establish locations
@@ -59,16 +100,19 @@ class Enterprise(Model):
             self.locations[locs.loc[l]["LOC"]] = loc
             self.num_locations+=1
         
+        #Precompute distance and PCS cost between every pair of locations
+        self.locmatrix = LocationMatrix(self.locations)
+        
         #Read in unit data
         #--> Node ID, UIC, NAM, LOCID, CMD
-        Units = pd.DataFrame().from_csv("orgs.csv")
+        Units = pd.DataFrame().from_csv(os.path.join(self.datadir,"orgs.csv"))
         
         #Read in network specific chain of command
-        self.unit_network, self.unit_displaypos = ReadNetLayout("command.net")  
+        self.unit_network, self.unit_displaypos = ReadNetLayout(os.path.join(self.datadir,"command.net"))  
         
         #Read in TDA data
         #--> UIC,UPN,LOCID,PLN,GRD,SER,STP,CMD,FND,OCN,EID,LNM,DERS,FMSZ,DWL,SKLZ,EXP,SCD
-        TDAData = pd.DataFrame().from_csv("tdadata.csv").groupby("UIC")
+        TDAData = pd.DataFrame().from_csv(os.path.join(self.datadir,"tdadata.csv")).groupby("UIC")
     
         #Establish units
         unit_params = {}
@@ -78,7 +122,7 @@ class Enterprise(Model):
             unit = Units.loc[uic]
             
             #Set up unit parameters UIC, name, and command
-            unit_params = {"UIC":uic, "NAM":unit["NAM"], "CMD":unit["CMD"], "NID":unit["NID"]}
+            unit_params = {"UIC":uic, "NAM":unit["NAM"], "CMD":unit["CMD"], "NID":unit["NID"], "LOC":unit["LOC"]}
             
             #Instantiate Unit Agent
             newunit = Unit(i,self,**unit_params)
@@ -88,9 +132,11 @@ class Enterprise(Model):
             
             #keep track of Agents IDs for network instantiation
             netw = []
+            if self.cohorts:
+                netw = self.LoadCohorts(newunit, myo)
             for uid in myo.index:
                 newagt = None
-                if myo.loc[uid]["EID"] != "VACANT":
+                if myo.loc[uid]["EID"] != "VACANT" and not self.cohorts:
                     newagt = BaseAgent(myo.loc[uid]["EID"],self)
                 
                     # Place Billet and Employee
@@ -135,11 +181,16 @@ class Enterprise(Model):
                 self.unit_network.add_node(myo.loc[uid]["UPN"])
                 #print("Adding Edge from: ",myo.loc[uid]["UPN"]," to: ", Units.loc[uic]["NID"])
                 self.unit_network.add_edge(myo.loc[uid]["UPN"], Units.loc[uic]["NID"])
+            
+            if self.cohorts:
+                for c in newunit.cohorts:
+                    newunit.AssignCohort(c)
                     
             for (n_i,i_w) in netw:
                 for (n_j,j_w) in netw:
-                    if (n_j != j_w):
-                        dwellweight = i_w / j_w #Risk of DIV/0
+                    if (n_i != n_j):
+                        #A new arrival has dwell 0; count it as one day
+                        dwellweight = i_w / max(j_w, 1)
                         self.agt_network.add_edge(n_i,n_j,weight=dwellweight)
                             
             #Add location to Schedule
@@ -153,24 +204,116 @@ class Enterprise(Model):
             i+=1
             
         self.num_locations = i
+        
+        if self.forecastopt:
+            self.forecast = RotationForecast(self)
+        if self.netstatsopt:
+            self.netstats = NetworkTracker(self.agt_network)
+            self.netstats.Snapshot(self.date)
 
         #Load TDAs into Locations
 
+    ############################################################################
+    # LoadCohorts: Group a unit's occupied billets into weighted CohortAgents
+    #              keyed on CohortAgent.COHORT_KEY. Returns [UPI, dwell] pairs
+    #              for network instantiation.
+    def LoadCohorts(self,newunit,myo):
+        occ = myo[myo["EID"] != "VACANT"].copy()
+        occ["DWB"] = occ["DWL"] // self.cohortbucket
+        occ["TGB"] = occ["TIG"] // self.cohortbucket
+        basedays = self.date.toordinal()
+        netw = []
+        newunit.cohorts = []
+        for key, grp in occ.groupby(CohortAgent.COHORT_KEY):
+            first = grp.iloc[0]
+            newagt = CohortAgent(self.NextCohortID(),self)
+            s = self.paytable.GetSalVal(first["LOC"],first["GRD"],first["STP"])
+            emp_dict = {"SAL":s, "UNT": newunit}
+            for d in ["OCN", "TYP", "GRD", "SER", "STP", "LOC", "LNM", "SCD", "FMS", "AGE"]:
+                emp_dict[d] = first[d]
+            #Keep the dwell a numpy value like the per-employee rows
+            emp_dict["DWL"] = np.int64(round(grp["DWL"].mean()))
+            emp_dict["TIG"] = int(grp["TIG"].mean())
+            emp_dict["FEX"] = first["FEX"].split("|")
+            emp_dict["GEX"] = first["GEX"].split("|")
+            newagt.NewPosition(**emp_dict)
+            newagt.SetMembers(grp["EID"].values, grp["PLN"].values, grp["LNM"].values,
+                              [basedays - int(365 * v) for v in grp["SCD"]],
+                              [basedays - int(365 * v) for v in grp["AGE"]])
+            
+            #Unit aggregate experience counts every member
+            newunit.agg_funcexp.add(newagt.getfuncexp(), newagt.getweight())
+            newunit.agg_geoexp.add(newagt.getgeoexp(), newagt.getweight())
+            
+            netw.append([newagt.getUPI(),newagt.getdwell()])
+            self.agt_network.add_node(newagt.getUPI(),object=newagt,weight=newagt.getweight())
+            self.num_baseagents += newagt.getweight()
+            self.schedule.add(newagt)
+            newunit.cohorts.append(newagt)
+        return netw
+    
+    def NextCohortID(self):
+        self.num_cohorts += 1
+        return "C%07d"%(self.num_cohorts)
+
     def PrintLocations(self):
         for a in self.schedule.agents:
             print(a)
             
-    def RemoveAgent(self,agt):
+    def RemoveAgent(self,agt,date=None):
+        #date: the day the agent left, when earlier than today
+        agt.exitdate = self.date if date is None else date
         self.deadpool.append(agt)
         self.schedule.remove(agt)
+        #Agent leaves the workforce network
+        if self.netstats is not None:
+            self.netstats.RemoveNode(agt.getUPI(), agt.exitdate)
+        elif agt.getUPI() in self.agt_network:
+            self.agt_network.remove_node(agt.getUPI())
+    
+    def AddNetworkNode(self,uid,edges=(),**attr):
+        #edges: [(nbr, weight), ...]
+        if self.netstats is not None:
+            self.netstats.AddNode(uid, edges, **attr)
+        else:
+            self.agt_network.add_node(uid, **attr)
+            self.agt_network.add_edges_from([(uid, m, {"weight": w}) for (m, w) in edges])
+    
+    def RecordNetworkStats(self,elapsed):
+        self.netstats.Snapshot(self.date)
         
-    def step(self):
-        print("Model step ",self.date)
-        self.date = self.date + dt.timedelta(days=1)
-        #Step Through Agents
-        self.schedule.step()
-        
+    def ApplyEvents(self,elapsed):
+        #Reorganization events take effect before anyone steps that day
+        self.events.Apply(self.date)
+    
+    def StepAgents(self,elapsed):
+        #Agents keep daily counters (dwell, time in step) and date their pay
+        #history, so each skipped day is replayed on its own date
+        today = self.date
+        for d in range(elapsed - 1, -1, -1):
+            self.date = today - dt.timedelta(days=d)
+            self.schedule.step()
+        self.date = today
+    
+    def StepUnits(self,elapsed):
         #Step through units for clean-up
         #ul = np.random.shuffle(list(self.units.keys()))
         for u in self.units.keys():
-            self.units[u].step()
+            self.units[u].step(elapsed)
+            
+    def PostVacancies(self,elapsed):
+        #Diff the billet occupancy bitmap and post new vacancies in one batch
+        rows = self.billets.NewVacancies()
+        if len(rows):
+            self.jobboard.AdvertiseBatch(rows)
+    
+    def PrePostVacancies(self,elapsed):
+        self.jobboard.PrePost(self.forecast)
+    
+    def StepJobBoard(self,elapsed):
+        self.jobboard.step()
+            
+    def step(self):
+        print("Model step ",self.date)
+        self.date = self.date + dt.timedelta(days=1)
+        self.stages.step()
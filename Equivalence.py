@@ -0,0 +1,228 @@
+import os
+import csv
+import time
+import random
+import math
+import shutil
+import numpy as np
+import numpy.random as npr
+from Enterprise import *
+from BaseAgent import *
+from Replication import tQuantile
+
+##############################################################################
+# Engines: Enterprise keyword options naming each engine under test. The
+# reference engine is the object-per-agent model with daily units.
+# "cohort" groups only employees with identical dwell and time in grade;
+# "cohort-bucketed" uses the default 30-day buckets and averages time in
+# grade, so WGIs inside a bucket can shift by days. Cohort engines draw one
+# binomial per cohort at an extension review where the reference draws one
+# uniform per employee, so past the first review they can only be compared
+# statistically (EquivalenceHarness with seeds > 1). Units stepping less
+# than daily ("business", "weekly", the model default) record every day
+# exactly, but apply extension reviews, and so their random draws, at the
+# next unit step.
+DAILY = {"units": "daily"}
+ENGINES = {"reference":       {"cadence": DAILY},
+           "cohort":          {"cohorts": True, "cohortbucket": 1, "cadence": DAILY},
+           "cohort-bucketed": {"cohorts": True, "cadence": DAILY},
+           "business":        {"cadence": {"units": "business"}},
+           "weekly":          {"cadence": {"units": "weekly"}}}
+
+##############################################################################
+# CanonicalTrace: Engine-independent snapshot of the model after a step.
+#   Counts are weighted so cohort records count once per member.
+def CanonicalTrace(model):
+    tr = {}
+    for s in BaseAgent.AGT_STATUS:
+        tr["status:" + s] = 0
+    salary = 0.0
+    left = {BaseAgent.AGT_STATUS["retired"]: 0, BaseAgent.AGT_STATUS["released"]: 0}
+    for uic in model.units:
+        unit = model.units[uic]
+        filled = 0
+        for eid in unit.roster:
+            agt = unit.roster[eid]
+            w = agt.getweight()
+            if agt.status in left:
+                #Gone, though its unit has not stepped since
+                left[agt.status] += w
+                continue
+            name = [k for k in BaseAgent.AGT_STATUS if BaseAgent.AGT_STATUS[k] == agt.status]
+            tr["status:" + name[0]] += w
+            salary += agt.getsalary() * w
+            filled += w
+        tr["fill:%s"%(uic)] = filled / len(unit.TDA)
+    tr["salary"] = salary
+    tr["wgis"] = model.num_wgis
+    for (field, status) in [("retirements", "retired"), ("releases", "released")]:
+        tr[field] = left[BaseAgent.AGT_STATUS[status]] + sum([a.getweight() for a in model.deadpool
+                                                              if a.status == BaseAgent.AGT_STATUS[status]])
+    return tr
+
+##############################################################################
+# RecordTrace: Run one engine from the given inputs and seed, returning the
+#              per-day canonical traces and the run time (seconds).
+def RecordTrace(engine, basedate, ndays, seed=1, datadir="."):
+    opts = ENGINES[engine] if isinstance(engine, str) else engine
+    npr.seed(seed)
+    random.seed(seed)
+    t0 = time.perf_counter()
+    model = Enterprise(basedate, datadir=datadir, **opts)
+    model.random.seed(seed)
+    model.LoadData()
+    traces = [CanonicalTrace(model)]
+    for d in range(ndays):
+        model.step()
+        traces.append(CanonicalTrace(model))
+    model.stages.Flush()
+    return traces, time.perf_counter() - t0
+
+##############################################################################
+# FirstDivergence: First (day, field) where the traces differ by more than
+#   rtol (relative to max(1, |reference|)), with the surrounding context.
+def FirstDivergence(ref, opt, rtol=1e-9, context=3):
+    for day in range(min(len(ref), len(opt))):
+        diffs = []
+        for k in ref[day]:
+            r = ref[day][k]
+            o = opt[day].get(k)
+            if o is None or abs(r - o) > rtol * max(1.0, abs(r)):
+                diffs.append((k, r, o))
+        if diffs:
+            k = diffs[0][0]
+            lo = max(0, day - context)
+            hist = [(d, ref[d][k], opt[d].get(k)) for d in range(lo, min(day + context + 1, len(ref), len(opt)))]
+            return {"day": day, "field": k, "ref": diffs[0][1], "opt": diffs[0][2],
+                    "fields": diffs, "context": hist}
+    if len(ref) != len(opt):
+        return {"day": min(len(ref), len(opt)), "field": "length", "ref": len(ref), "opt": len(opt),
+                "fields": [], "context": []}
+    return None
+
+##############################################################################
+# SeedTraces: Run one engine once per seed; returns {field: array of shape
+#   (seeds, ndays+1)} and the total run time.
+def SeedTraces(engine, basedate, ndays, seeds, datadir="."):
+    runs = []
+    total = 0.0
+    for s in seeds:
+        tr, t = RecordTrace(engine, basedate, ndays, s, datadir)
+        runs.append(tr)
+        total += t
+    fields = list(runs[0][0].keys())
+    return {k: np.array([[tr[d].get(k, 0.0) for d in range(ndays + 1)] for tr in runs]) for k in fields}, total
+
+##############################################################################
+# MeanDivergence: First checkpoint day where some field's mean differs
+#   between engines by more than a two-sample t confidence half-width (plus
+#   rtol, so fields without variance must agree). Checkpoints are every
+#   'every' days and the last day; the confidence is Bonferroni-corrected
+#   over all checkpoint x field tests.
+def MeanDivergence(ref, opt, confidence=0.95, every=30, rtol=1e-9):
+    n1 = next(iter(ref.values())).shape[0]
+    n2 = next(iter(opt.values())).shape[0]
+    ndays = next(iter(ref.values())).shape[1] - 1
+    days = sorted(set(range(0, ndays + 1, every)) | {ndays})
+    q = tQuantile(1 - (1 - confidence) / (2 * len(days) * len(ref)), n1 + n2 - 2)
+    for day in days:
+        diffs = []
+        for k in ref:
+            a = ref[k][:, day]
+            b = opt[k][:, day] if k in opt else np.full(n2, np.nan)
+            hw = q * math.sqrt(a.var(ddof=1) / n1 + b.var(ddof=1) / n2) + rtol * max(1.0, abs(a.mean()))
+            if not abs(b.mean() - a.mean()) <= hw:
+                diffs.append((k, float(a.mean()), float(b.mean()), hw))
+        if diffs:
+            return {"day": day, "field": diffs[0][0], "ref": diffs[0][1], "opt": diffs[0][2],
+                    "halfwidth": diffs[0][3], "fields": diffs, "context": []}
+    return None
+
+##############################################################################
+# ScaleInputs: Write a synthetic copy of the input files to outdir with the
+#   TDA replicated factor times (new EIDs, PLNs and UPNs per copy).
+def ScaleInputs(datadir, outdir, factor):
+    os.makedirs(outdir, exist_ok=True)
+    for f in ["2018-general-schedule-pay-rates.csv", "locations.csv", "orgs.csv", "command.net"]:
+        shutil.copy(os.path.join(datadir, f), os.path.join(outdir, f))
+    with open(os.path.join(datadir, "tdadata.csv"), newline="") as fd:
+        rows = list(csv.DictReader(fd))
+    fields = list(rows[0].keys())
+    eidbase = max([int(r["EID"]) for r in rows if r["EID"] != "VACANT"] + [len(rows)]) + 1
+    upnbase = max([int(r["UPN"]) for r in rows]) + 1
+    with open(os.path.join(outdir, "tdadata.csv"), "w", newline="") as fd:
+        wr = csv.DictWriter(fd, fieldnames=fields)
+        wr.writeheader()
+        for k in range(factor):
+            for (i, r) in enumerate(rows):
+                row = dict(r)
+                if k > 0:
+                    row["PLN"] = "%s-%d"%(r["PLN"], k)
+                    row["UPN"] = str(int(r["UPN"]) + k * upnbase)
+                    if r["EID"] != "VACANT":
+                        row["EID"] = str(eidbase * k + i)
+                wr.writerow(row)
+    return outdir
+
+##############################################################################
+# CLASS:: EquivalenceHarness
+#
+# Purpose: Runs the reference engine and an optimized engine from the same
+#          inputs and seed, compares their canonical traces day by day and
+#          reports the first divergence and the speedup. With seeds > 1 both
+#          engines run seeds replicates and their mean traces are compared
+#          within confidence bounds instead (for stochastic engines).
+class EquivalenceHarness:
+    def __init__(self, basedate, ndays, optimized="cohort", reference="reference",
+                 seed=1, datadir=".", rtol=1e-9, seeds=1, confidence=0.95, every=30):
+        self.basedate = basedate
+        self.ndays = ndays
+        self.optimized = optimized
+        self.reference = reference
+        self.seed = seed
+        self.datadir = datadir
+        self.rtol = rtol
+        self.seeds = seeds
+        self.confidence = confidence
+        self.every = every
+        self.report = None
+
+    ############################################################################
+    #
+    def Run(self):
+        if self.seeds > 1:
+            seeds = range(self.seed, self.seed + self.seeds)
+            ref, reftime = SeedTraces(self.reference, self.basedate, self.ndays, seeds, self.datadir)
+            opt, opttime = SeedTraces(self.optimized, self.basedate, self.ndays, seeds, self.datadir)
+            div = MeanDivergence(ref, opt, self.confidence, self.every, self.rtol)
+        else:
+            ref, reftime = RecordTrace(self.reference, self.basedate, self.ndays, self.seed, self.datadir)
+            opt, opttime = RecordTrace(self.optimized, self.basedate, self.ndays, self.seed, self.datadir)
+            div = FirstDivergence(ref, opt, self.rtol)
+        self.report = {"equivalent": div is None, "divergence": div, "days": self.ndays, "seeds": self.seeds,
+                       "reftime": reftime, "opttime": opttime,
+                       "speedup": reftime / opttime if opttime > 0 else float("inf")}
+        return self.report
+
+    ############################################################################
+    #
+    def PrettyPrint(self):
+        r = self.report
+        print("Equivalence: %s vs %s over %d days"%(self.reference, self.optimized, r["days"]))
+        if r["seeds"] > 1:
+            print("\t     Seeds: %d (mean traces, %d%% confidence)"%(r["seeds"], round(100 * self.confidence)))
+        print("\t Reference: %1.3fs"%(r["reftime"]))
+        print("\t Optimized: %1.3fs"%(r["opttime"]))
+        print("\t   Speedup: %1.2fx"%(r["speedup"]))
+        if r["equivalent"]:
+            print("\t Mean traces within bounds" if r["seeds"] > 1 else "\t Traces identical")
+            return
+        d = r["divergence"]
+        print("\t First divergence on day %d, field %s: ref=%s opt=%s"%(d["day"], d["field"], d["ref"], d["opt"]))
+        for f in d["fields"]:
+            print("\t\t %s: ref=%s opt=%s"%f[:3] + (" (bound %s)"%(f[3]) if len(f) > 3 else ""))
+        if not d["context"]:
+            return
+        print("\t Context (%s):"%(d["field"]))
+        for (day, rv, ov) in d["context"]:
+            print("\t\t day %4d: ref=%s opt=%s"%(day, rv, ov))
@@ -3,6 +3,7 @@ import numpy as np
 import pandas as pd
 import datetime as dt
 from random import choice
+from AssignmentSolver import *
 
 ##############################################################################
 # CLASS:: JobBoard
@@ -43,7 +44,8 @@ class VacancyAnnouncement(Agent):
         pass
 
     def step(self):
-        if self.expires < self.model.date:
+        #Only open listings close; later statuses are left as decided
+        if self.open and self.expires < self.model.date:
             self.open = False
             self.status = "closed"
     
@@ -71,7 +73,7 @@ class VacancyAnnouncement(Agent):
 # Purpose: Implements a generic agent in an organization.
 #
 class JobBoard(Agent):
-    def __init__(self,uid, model):
+    def __init__(self,uid, model, matching=False):
         super().__init__(uid, model)
         self.openpos = {}
         self.closedpos = {}
@@ -79,22 +81,27 @@ class JobBoard(Agent):
         self.numttlpos= 0
         self.avghirelag = 90 #days
         self.minopentime = 14 #days
+        self.prepostdays = 60 #days ahead to pre-post forecast openings
+        self.preposted = set() #(UIC, PLN) already advertised ahead of time
+        self.solver = AssignmentSolver(model) if matching else None
 
     def getopenings(self): return self.openpos
         
-    def getUniqueID(self,d,i=1):
-        #Create unique ID
-        s=("%04d%02d%02d%02d%02d%02d_W%04d"%(d.year,d.month,d.day,d.hour,d.minute,d.second,i))
-        if (s in self.openpos.keys()):
-            s = self.getUniqueID(d,i+1)
-        return s
+    def getUniqueID(self,d,i=None):
+        #Create unique ID from the open date and the running announcement count
+        if i is None:
+            i = self.numttlpos
+        return "%04d%02d%02d_W%06d"%(d.year,d.month,d.day,i)
 
     def step(self):
         #Check expiration date on new applications
         self.updatelistings()
         
         #Select Candidates
-        self.rankselect()
+        if self.solver is not None:
+            self.batchselect()
+        else:
+            self.rankselect()
         
     def updatelistings(self):
         cps = []
@@ -103,8 +110,10 @@ class JobBoard(Agent):
                 self.closedpos[vacid] = self.openpos[vacid]
                 cps.append(vacid)
         for cp in cps: 
-            #del self.openpos[cp]
-            print("CLOSED... NEED TO DO SOMETHING HERE")
+            del self.openpos[cp]
+            #A closed listing has nothing left to do each day; the board
+            #reviews it from closedpos
+            self.model.schedule.remove(self.closedpos[cp])
         
     def rankselect(self):
         #unit_policy = {"geoexp":0.5,"funcexp":0.5}
@@ -113,7 +122,7 @@ class JobBoard(Agent):
         for vacid in self.closedpos:
             #Adjust for lagtime
             status = self.closedpos[vacid].status
-            if status == "selected":
+            if status == "selected" or status == "cancelled" or status == "reviewed":
                 pass
             elif status == "accepted":
                 pass
@@ -121,13 +130,37 @@ class JobBoard(Agent):
                   self.model.date) or (status == "declined"):
                 self.extendoffer(vacid, self.apprevpolicy(vacid))
 
+    ############################################################################
+    # batchselect: Fill every vacancy past its review lag jointly, so each
+    #              applicant is offered at most one job per cycle
+    def batchselect(self):
+        due = [vac for vac in self.closedpos.values() if (vac.status == "closed" and
+               (vac.expires + dt.timedelta(vac.lagtime)) < self.model.date)]
+        if not due:
+            return
+        picks = self.solver.Solve(due)
+        for vac in due:
+            #Decided listings leave the review pool for good
+            self.completedpos[vac.vacid] = self.closedpos.pop(vac.vacid)
+            agt = picks[vac.vacid]
+            vac.completedate = self.model.date
+            if agt is None:
+                vac.status = "cancelled"
+                continue
+            vac.status = "selected"
+            vac.candidates = [agt]
+            agt.joboffer = {"VACID": vac.vacid, "UNIT": vac.unit, "BILLET": vac.billet,
+                            "LOC": vac.unit.getlocid(), "DATE": self.model.date}
+        print("Job board matched %d of %d vacancies (%s)"%(sum([picks[v] is not None for v in picks]),
+                                                          len(due), self.solver.lastmethod))
+        
     def Advertise(self,**kwargs):
         #Create open date and unique identifier
-        sudate = dt.datetime.now() #!! Need to update to current Model time
+        sudate = self.model.date
         suid = self.getUniqueID(sudate)
         
         #Generate the vacancy announcement
-        advert = VacancyAnnouncement(self.numttlpos,self.model,**kwargs, EXP=self.minopentime, 
+        advert = VacancyAnnouncement(suid,self.model,**kwargs, EXP=self.minopentime, 
                                      LAG=self.avghirelag, SDATE=sudate, SUID=suid)
         
         #Update the object statistics
@@ -139,6 +172,51 @@ class JobBoard(Agent):
         #Return the locator ID to the unit
         return suid
     
+    ############################################################################
+    # AdvertiseBatch: Post announcements for rows of the model's BilletTable
+    def AdvertiseBatch(self,rows):
+        tbl = self.model.billets
+        plns = tbl.getcol("pln")[rows]
+        uics = tbl.getcol("uic")[rows]
+        sudate = self.model.date
+        suids = []
+        for (pln, uic) in zip(plns, uics):
+            if (uic, pln) in self.preposted:
+                #Already advertised from the rotation forecast
+                self.preposted.discard((uic, pln))
+                continue
+            unit = self.model.units[uic]
+            billet = unit.TDA[pln]
+            suid = self.getUniqueID(sudate)
+            advert = VacancyAnnouncement(suid,self.model,EXP=self.minopentime,LAG=self.avghirelag,
+                                         SDATE=sudate,SUID=suid,GEX=unit.getgeofocus(),GEXWGHTS=[0],
+                                         FEX=unit.getreqskills(),FEXWGHTS=[0],UNIT=unit,BILLET=billet,
+                                         LOC=billet.getloc())
+            self.openpos[suid] = advert
+            self.numttlpos += 1
+            self.model.schedule.add(advert)
+            unit.vacann.append(suid)
+            suids.append(suid)
+        return suids
+    
+    ############################################################################
+    # PrePost: Advertise billets the rotation forecast expects to open within
+    #          prepostdays with at least minprob probability
+    def PrePost(self,forecast,minprob=1.0):
+        end = self.model.date + dt.timedelta(days=self.prepostdays)
+        keys = []
+        for r in forecast.Query(self.model.date, end):
+            if r["prob"] < minprob:
+                continue
+            for pln in r["plns"]:
+                #One agent can have several certain openings in the window
+                key = (r["uic"], pln)
+                if key not in self.preposted and key not in keys:
+                    keys.append(key)
+        suids = self.AdvertiseBatch([self.model.billets.getrow(uic, pln) for (uic, pln) in keys])
+        self.preposted.update(keys)
+        return suids
+    
     def Apply(self,vacid,agt):
         self.openpos[vacid].AddApplicant(agt)
                     
@@ -146,7 +224,7 @@ class JobBoard(Agent):
         if final is None:
             #There were no applicants 
             self.closedpos[vacid].status = "cancelled"
-            self.closedpos[vacid].completedate = self.model.time  
+            self.closedpos[vacid].completedate = self.model.date
         else:
             selectee = self.closedpos[vacid].select(final)
             self.closedpos[vacid].status = "reviewed"
@@ -5,6 +5,11 @@
 # Requires: NAM, GLC, LMS, GCC, ACT, OPP, OCN
 ##############################################################################
 
+def ParseLatLon(s):
+    #"(39.7, -104.9)" -> (39.7, -104.9)
+    lat, lon = str(s).strip().strip("()").split(",")
+    return float(lat), float(lon)
+
 class Location:
     def __init__(self,uid,model,**kwargs):
         self.model = model
@@ -0,0 +1,88 @@
+import numpy as np
+from Location import *
+##############################################################################
+# CLASS:: LocationMatrix
+#
+# Purpose: Compiles the model's Locations into arrays with precomputed
+#          great-circle distance (miles) and PCS cost matrices so move costs
+#          for whole candidate pools are a single array lookup.
+#
+# PCS cost from i to j for an employee with famsize dependents:
+#   cost[i,j] = ((BASE + PERMILE*dist + OCNFEE*(either end OCONUS))
+#                + famsize * (DEPBASE + DEPMILE*dist)) * (1 + ACT[j])
+# with no cost for a move within the same location.
+class LocationMatrix:
+    EARTH_RADIUS = 3958.8   #miles
+    BASE = 5000.0           #fixed household move cost
+    PERMILE = 1.5           #shipment cost per mile
+    OCNFEE = 10000.0        #OCONUS move surcharge
+    DEPBASE = 1500.0        #fixed cost per dependent
+    DEPMILE = 0.25          #travel cost per dependent per mile
+
+    def __init__(self, locations):
+        self.locids = list(locations.keys())
+        self.index = {l: i for (i, l) in enumerate(self.locids)}
+        n = len(self.locids)
+        self.lat = np.zeros(n)
+        self.lon = np.zeros(n)
+        self.ocn = np.zeros(n, dtype=bool)
+        self.act = np.zeros(n)
+        for (i, l) in enumerate(self.locids):
+            loc = locations[l]
+            self.lat[i], self.lon[i] = ParseLatLon(loc.getlatlon())
+            self.ocn[i] = bool(loc.getconus())
+            self.act[i] = float(loc.getaddcosts())
+        self.distance = self.GreatCircle()
+        self.BuildCosts()
+
+    ############################################################################
+    # GreatCircle: haversine distance between every pair of locations
+    def GreatCircle(self):
+        lat = np.radians(self.lat)
+        lon = np.radians(self.lon)
+        dlat = lat[None, :] - lat[:, None]
+        dlon = lon[None, :] - lon[:, None]
+        h = np.sin(dlat / 2)**2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2)**2
+        return 2 * LocationMatrix.EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    ############################################################################
+    # BuildCosts: household and per-dependent PCS cost matrices
+    def BuildCosts(self):
+        c = LocationMatrix
+        ocnmove = self.ocn[:, None] | self.ocn[None, :]
+        factor = 1 + self.act[None, :]
+        self.pcscost = (c.BASE + c.PERMILE * self.distance + c.OCNFEE * ocnmove) * factor
+        self.depcost = (c.DEPBASE + c.DEPMILE * self.distance) * factor
+        np.fill_diagonal(self.pcscost, 0.0)
+        np.fill_diagonal(self.depcost, 0.0)
+
+    ############################################################################
+    #
+    def getdistance(self, orig, dest):
+        return self.distance[self.index[orig], self.index[dest]]
+
+    def Indices(self, locids):
+        return np.array([self.index[l] for l in np.atleast_1d(locids)], dtype=int)
+
+    ############################################################################
+    # MoveCosts: vectorized PCS cost for arrays (or scalars) of origin and
+    #            destination location IDs and family sizes
+    def MoveCosts(self, orig, dest, famsize=0):
+        oi = self.Indices(orig)
+        di = self.Indices(dest)
+        return self.pcscost[oi, di] + np.asarray(famsize) * self.depcost[oi, di]
+
+    ############################################################################
+    # AgentMoveCosts: cost to move each agent from their unit's location to
+    #                 destination location dest
+    def AgentMoveCosts(self, agents, dest):
+        orig = [a.unit.getlocid() for a in agents]
+        fams = np.array([a.getfamsize() for a in agents], dtype=float)
+        return self.MoveCosts(orig, [dest] * len(orig), fams)
+
+    ############################################################################
+    #
+    def PrettyPrint(self):
+        print("Locations: ", self.locids)
+        print("\t distance (mi):\n", np.round(self.distance, 1))
+        print("\t pcs cost ($):\n", np.round(self.pcscost, 0))
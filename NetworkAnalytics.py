@@ -0,0 +1,258 @@
+import math
+import random
+from collections import deque
+import numpy as np
+
+##############################################################################
+# BFS: unweighted single-source shortest paths.
+#   Returns (dist, sigma, preds): hop distance, number of shortest paths and
+#   shortest-path predecessors for every node reachable from s.
+def BFS(G, s):
+    dist = {s: 0}
+    sigma = {s: 1}
+    preds = {s: []}
+    q = deque([s])
+    while q:
+        v = q.popleft()
+        for w in G[v]:
+            if w == v:
+                continue
+            if w not in dist:
+                dist[w] = dist[v] + 1
+                sigma[w] = 0
+                preds[w] = []
+                q.append(w)
+            if dist[w] == dist[v] + 1:
+                sigma[w] += sigma[v]
+                preds[w].append(v)
+    return dist, sigma, preds
+
+##############################################################################
+# CLASS:: NetworkTracker
+#
+# Purpose: Cohesion statistics for the agent network (Enterprise.agt_network).
+#          Degree, strength (weighted degree) and connected components are
+#          maintained incrementally as nodes are added or removed, and
+#          betweenness/closeness are estimated by sampling with explicit
+#          (eps, delta) error bounds so they can run on a periodic cadence.
+#          Shortest paths are counted in hops; edge weights only enter the
+#          strength statistics.
+class NetworkTracker:
+    def __init__(self, graph, eps=0.05, delta=0.1, sampled=True, seed=None):
+        self.G = graph
+        self.eps = eps
+        self.delta = delta
+        self.sampled = sampled
+        self.rng = random.Random(seed)
+        self.degree = {}
+        self.strength = {}
+        self.numedges = 0
+        self.totalweight = 0.0
+        self.comp = {}        #node -> component id
+        self.members = {}     #component id -> set of nodes
+        self.nextcomp = 0
+        self.lost = []        #knowledge-loss records of removed nodes
+        self.history = []
+        self.Rebuild()
+
+    ############################################################################
+    # Rebuild: full recount (used once at start)
+    def Rebuild(self):
+        self.degree = dict(self.G.degree())
+        self.strength = dict(self.G.degree(weight="weight"))
+        self.numedges = self.G.number_of_edges()
+        self.totalweight = float(self.G.size(weight="weight"))
+        self.comp = {}
+        self.members = {}
+        for n in self.G:
+            if n not in self.comp:
+                self.Label(n, self.nextcomp, lambda m: m not in self.comp)
+                self.nextcomp += 1
+
+    def Label(self, start, cid, allowed):
+        #Flood-fill the nodes reachable from start through allowed nodes
+        self.comp[start] = cid
+        mem = {start}
+        q = deque([start])
+        while q:
+            v = q.popleft()
+            for w in self.G[v]:
+                if w != v and allowed(w) and self.comp.get(w) != cid:
+                    self.comp[w] = cid
+                    mem.add(w)
+                    q.append(w)
+        self.members[cid] = mem
+        return len(mem)
+
+    ############################################################################
+    # AddNode: add a node and its weighted edges [(nbr, weight), ...]
+    def AddNode(self, n, edges=(), **attr):
+        self.G.add_node(n, **attr)
+        self.degree.setdefault(n, 0)
+        self.strength.setdefault(n, 0.0)
+        self.comp[n] = self.nextcomp
+        self.members[self.nextcomp] = {n}
+        self.nextcomp += 1
+        for (m, w) in edges:
+            if m == n or self.G.has_edge(n, m):
+                continue
+            self.G.add_edge(n, m, weight=w)
+            self.numedges += 1
+            self.totalweight += w
+            for x in (n, m):
+                self.degree[x] += 1
+                self.strength[x] += w
+            self.Merge(self.comp[n], self.comp[m])
+
+    def Merge(self, a, b):
+        if a == b:
+            return
+        if len(self.members[a]) < len(self.members[b]):
+            a, b = b, a
+        for x in self.members[b]:
+            self.comp[x] = a
+        self.members[a] |= self.members.pop(b)
+
+    ############################################################################
+    # RemoveNode: remove a node, updating its neighbours' degree/strength and
+    #             re-labelling only the component it belonged to
+    def RemoveNode(self, n, date=None):
+        if n not in self.G:
+            return
+        nbrs = [m for m in self.G[n] if m != n]
+        for (m, d) in self.G[n].items():
+            w = d.get("weight", 1)
+            self.numedges -= 1
+            self.totalweight -= w
+            if m != n:
+                self.degree[m] -= 1
+                self.strength[m] -= w
+        obj = self.G.nodes[n].get("object")
+        self.lost.append({"date": date, "node": n, "degree": self.degree[n],
+                          "strength": self.strength[n],
+                          "weight": self.G.nodes[n].get("weight", 1),
+                          "dwell": obj.getdwell() if obj is not None else 0})
+        self.G.remove_node(n)
+        cid = self.comp.pop(n)
+        self.degree.pop(n)
+        self.strength.pop(n)
+        self.members.pop(cid)
+
+        #Re-label what is left of the old component, one piece at a time
+        for m in nbrs:
+            if self.comp.get(m) == cid:
+                self.Label(m, self.nextcomp, lambda x: self.comp.get(x) == cid)
+                self.nextcomp += 1
+
+    ############################################################################
+    # Components: (number of components, largest component size)
+    def Components(self):
+        if not self.members:
+            return 0, 0
+        return len(self.members), max([len(m) for m in self.members.values()])
+
+    ############################################################################
+    # VertexDiameter: upper bound on nodes in a shortest path (2x eccentricity
+    #   of one node per component, plus one)
+    def VertexDiameter(self):
+        seen = set()
+        vd = 1
+        for n in self.G:
+            if self.comp[n] in seen:
+                continue
+            seen.add(self.comp[n])
+            dist, sigma, preds = BFS(self.G, n)
+            vd = max(vd, 2 * max(dist.values()) + 1)
+        return vd
+
+    ############################################################################
+    # BetweennessSampleSize: Riondato-Kornaropoulos sample size so every
+    #   normalized betweenness estimate is within eps w.p. at least 1-delta
+    def BetweennessSampleSize(self, eps=None, delta=None, c=0.5):
+        eps = self.eps if eps is None else eps
+        delta = self.delta if delta is None else delta
+        vd = self.VertexDiameter()
+        vc = math.floor(math.log2(vd - 2)) + 1 if vd > 2 else 1
+        return int(math.ceil((c / eps**2) * (vc + math.log(1 / delta))))
+
+    ############################################################################
+    # SampledBetweenness: sample node pairs uniformly, pick one of their
+    #   shortest paths uniformly and credit its interior nodes. Estimates
+    #   betweenness as a fraction of all n(n-1) ordered node pairs (the
+    #   networkx normalized value times (n-2)/n).
+    def SampledBetweenness(self, eps=None, delta=None):
+        nodes = list(self.G)
+        bc = dict.fromkeys(nodes, 0.0)
+        if len(nodes) < 3:
+            return bc
+        r = self.BetweennessSampleSize(eps, delta)
+        for i in range(r):
+            u, v = self.rng.sample(nodes, 2)
+            if self.comp[u] != self.comp[v]:
+                continue
+            dist, sigma, preds = BFS(self.G, u)
+            w = v
+            while True:
+                p = preds[w]
+                x = self.rng.random() * sigma[w]
+                acc = 0
+                for z in p:
+                    acc += sigma[z]
+                    if x < acc:
+                        break
+                w = z
+                if w == u:
+                    break
+                bc[w] += 1.0 / r
+        return bc
+
+    ############################################################################
+    # SampledCloseness: Eppstein-Wang pivot sampling. With
+    #   k = ln(2n/delta) / (2 eps^2) pivots, each node's mean distance is
+    #   within eps x (component diameter) of exact w.p. at least 1-delta.
+    #   Closeness follows networkx (Wasserman-Faust scaling by component).
+    def SampledCloseness(self, eps=None, delta=None):
+        eps = self.eps if eps is None else eps
+        delta = self.delta if delta is None else delta
+        nodes = list(self.G)
+        n = len(nodes)
+        cc = dict.fromkeys(nodes, 0.0)
+        if n < 2:
+            return cc
+        k = min(n, int(math.ceil(math.log(2 * n / delta) / (2 * eps**2))))
+        total = dict.fromkeys(nodes, 0.0)
+        count = dict.fromkeys(nodes, 0)
+        for u in self.rng.sample(nodes, k):
+            dist, sigma, preds = BFS(self.G, u)
+            for v in dist:
+                total[v] += dist[v]
+                count[v] += 1
+        for v in nodes:
+            s = len(self.members[self.comp[v]])
+            if s < 2 or count[v] == 0:
+                continue
+            avg = (total[v] / count[v]) * s / (s - 1)
+            if avg > 0:
+                cc[v] = (1.0 / avg) * (s - 1) / (n - 1)
+        return cc
+
+    ############################################################################
+    # Snapshot: record the current cohesion statistics
+    def Snapshot(self, date=None):
+        n = self.G.number_of_nodes()
+        ncomp, largest = self.Components()
+        rec = {"date": date, "nodes": n, "edges": self.numedges, "weight": self.totalweight,
+               "meandegree": np.mean(list(self.degree.values())) if n else 0.0,
+               "meanstrength": np.mean(list(self.strength.values())) if n else 0.0,
+               "density": 2.0 * self.numedges / (n * (n - 1)) if n > 1 else 0.0,
+               "components": ncomp, "largest": largest,
+               "lostnodes": sum([l["weight"] for l in self.lost]),
+               "loststrength": sum([l["strength"] for l in self.lost]),
+               "lostdwell": sum([l["dwell"] * l["weight"] for l in self.lost])}
+        if self.sampled:
+            bc = self.SampledBetweenness()
+            cc = self.SampledCloseness()
+            rec["maxbetweenness"] = max(bc.values()) if bc else 0.0
+            rec["meancloseness"] = np.mean(list(cc.values())) if cc else 0.0
+        self.history.append(rec)
+        return rec
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 ##############################################################################
 ##############################################################################
@@ -9,13 +10,35 @@ class PayTable:
     '''Read in the designated paytable into memory and group by locality. 
        Return the salary value when supplied the locality, grade, and step
     '''
-    def __init__(self, fptr):
-        self.paytabs = pd.DataFrame().from_csv(fptr).groupby("LOCNAME")
+    def __init__(self, fptr=None, frame=None):
+        if frame is None:
+            frame = pd.DataFrame().from_csv(fptr)
+        self.frame = frame
+        self.paytabs = frame.groupby("LOCNAME")
     
     def GetSalVal(self,loc,grade,step):
         st = "ANNUAL%d"%step
         return self.paytabs.get_group(loc)[st].iloc[int(grade)-1]
     
+    def ToArray(self):
+        '''Return (locality names, salaries[locality, grade-1, step-1]) for
+           vectorized lookups'''
+        locs = sorted(self.paytabs.groups.keys())
+        cols = ["ANNUAL%d"%s for s in range(1, 11)]
+        arr = np.stack([self.paytabs.get_group(l)[cols].values.astype(float) for l in locs])
+        return locs, arr
+    
+    def Scaled(self, raise_, locs=None):
+        '''Return a copy with every salary (or only those of the listed
+           localities) raised by the fraction raise_, rounded to dollars'''
+        frame = self.frame.copy()
+        cols = ["ANNUAL%d"%s for s in range(1, 11)]
+        rows = np.ones(len(frame), dtype=bool)
+        if locs is not None:
+            rows = frame.reset_index()["LOCNAME"].isin(locs).values
+        frame.loc[rows, cols] = (frame.loc[rows, cols] * (1 + raise_)).round()
+        return PayTable(frame=frame)
+    
     def GetStep(self,curstep,timeinstep):
         if curstep < 4 and timeinstep >= 365:
             return curstep + 1
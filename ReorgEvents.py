@@ -0,0 +1,146 @@
+import os
+import csv
+import numpy as np
+import networkx as nx
+import datetime as dt
+from Unit import *
+from PayTable import *
+
+##############################################################################
+# Reorganization event file (CSV):
+#
+#   DATE,EVENT,UIC,PLN,ARGS
+#   2018-10-01,RESTRUCTURE,W0001-0,300-01,AMS=110|AGD=13|SER=132
+#   2018-10-01,MDR,W0001-0,300-01,LOC=HI
+#   2018-11-01,ADDBILLET,W0001-0,300-90,UPN=100900|AMS=110|AGD=12|SER=132|LOC=DV
+#   2019-01-01,ADDUNIT,W0011-0,,NID=22|NAM=CYBER|LOC=5|CMD=GLOBAL|PARENT=9
+#   2019-01-01,REPARENT,W0006-3,,PARENT=8|CMD=GLOBAL
+#   2019-01-01,PAYTABLE,,,FILE=2019-general-schedule-pay-rates.csv
+#
+# ARGS holds "KEY=VALUE" pairs separated by "|", as list fields in tdadata.
+##############################################################################
+def ParseValue(v):
+    for f in (int, float):
+        try:
+            return f(v)
+        except ValueError:
+            pass
+    return v
+
+def ParseArgs(s):
+    args = {}
+    for kv in (s or "").split("|"):
+        if kv:
+            k, v = kv.split("=", 1)
+            args[k.strip()] = ParseValue(v.strip())
+    return args
+
+##############################################################################
+# CLASS:: ReorgEvents
+#
+# Purpose: Dated queue of force-structure and pay changes applied to a
+#          running Enterprise on their effective dates, updating billets,
+#          the billet table, unit hierarchy and salaries in place.
+class ReorgEvents:
+    EVENTS = ["RESTRUCTURE", "MDR", "ADDBILLET", "ADDUNIT", "REPARENT", "PAYTABLE"]
+
+    def __init__(self, model, file):
+        self.model = model
+        self.queue = []
+        self.next = 0
+        self.applied = []
+        with open(file, newline="") as fd:
+            for (i, r) in enumerate(csv.DictReader(fd)):
+                if r["EVENT"] not in ReorgEvents.EVENTS:
+                    raise ValueError("%s line %d: unknown event %s"%(file, i + 2, r["EVENT"]))
+                ev = {"DATE": dt.datetime.strptime(r["DATE"], "%Y-%m-%d"), "EVENT": r["EVENT"],
+                      "UIC": r.get("UIC") or None, "PLN": r.get("PLN") or None,
+                      "ARGS": ParseArgs(r.get("ARGS"))}
+                self.queue.append(ev)
+        self.queue.sort(key=lambda e: e["DATE"])
+
+    def getpending(self): return self.queue[self.next:]
+
+    ############################################################################
+    # Apply: apply every event effective on or before date
+    def Apply(self, date):
+        while self.next < len(self.queue) and self.queue[self.next]["DATE"] <= date:
+            ev = self.queue[self.next]
+            print("Reorg event: ", ev["DATE"].date(), ev["EVENT"], ev["UIC"] or "", ev["PLN"] or "")
+            getattr(self, ev["EVENT"].capitalize())(ev)
+            self.applied.append(ev)
+            self.next += 1
+
+    ############################################################################
+    # Event handlers
+    def Restructure(self, ev):
+        a = ev["ARGS"]
+        b = self.model.units[ev["UIC"]].TDA[ev["PLN"]]
+        b.Restructure(a.get("AMS", b.getamsco()), a.get("AGD", b.getgrade()), a.get("SER", b.getseries()))
+
+    def Mdr(self, ev):
+        unit = self.model.units[ev["UIC"]]
+        loc = ev["ARGS"]["LOC"]
+        unit.TDA[ev["PLN"]].MDR(loc)
+        #The occupant is paid at the billet's new locality
+        for agt in list(unit.roster.values()):
+            plns = agt.getplns()
+            if ev["PLN"] not in plns:
+                continue
+            if len(plns) > 1:
+                #Only the cohort members on this billet move
+                mask = agt.plns == ev["PLN"]
+                if not mask.all():
+                    agt = agt.Split(mask)
+            agt.lochist[self.model.date] = agt.curloc
+            agt.curloc = loc
+            agt.UpdateSalary(self.model.paytable.GetSalVal(loc, agt.grade, agt.paystep))
+            break
+
+    def Addbillet(self, ev):
+        a = ev["ARGS"]
+        unit = self.model.units[ev["UIC"]]
+        if ev["PLN"] in unit.TDA:
+            raise ValueError("ADDBILLET %s: unit %s already has paragraph/line %s"%(ev["DATE"].date(), ev["UIC"], ev["PLN"]))
+        unit.InitTDA(UPN=a["UPN"], AMS=a["AMS"], AGD=a["AGD"], SER=a["SER"], LOC=a["LOC"],
+                     PLN=ev["PLN"], OCC=None, KEY=False)
+        self.model.unit_network.add_node(a["UPN"])
+        self.model.unit_network.add_edge(a["UPN"], unit.getnid())
+
+    def Addunit(self, ev):
+        a = ev["ARGS"]
+        unit = Unit(len(self.model.units) + 1, self.model, UIC=ev["UIC"], NAM=a["NAM"],
+                    CMD=a["CMD"], NID=a["NID"], LOC=a["LOC"])
+        #Pad the day-indexed records back to the run start so they line up
+        #with the other units'; there is no payroll or fill rate before now
+        if self.model.units:
+            k = len(next(iter(self.model.units.values())).civpay)
+            unit.civpay = [0.0] * k
+            unit.fillrate = [np.nan] * k
+        self.model.units[ev["UIC"]] = unit
+        self.model.unit_network.add_node(a["NID"], name=a["NAM"])
+        if "PARENT" in a:
+            self.model.unit_network.add_edge(a["NID"], a["PARENT"], weight=1.0)
+
+    def Reparent(self, ev):
+        a = ev["ARGS"]
+        unit = self.model.units[ev["UIC"]]
+        g = self.model.unit_network
+        #Billets also point at the unit node; only re-point command edges
+        g.remove_edges_from([(unit.getnid(), p) for p in list(g.successors(unit.getnid()))])
+        g.add_edge(unit.getnid(), a["PARENT"], weight=1.0)
+        if "CMD" in a:
+            #Subordinate units move with it: edges point child -> parent, so
+            #they are the moved node's ancestors
+            subs = nx.ancestors(g, unit.getnid())
+            for u in self.model.units.values():
+                if u is unit or u.getnid() in subs:
+                    u.cmdno = a["CMD"]
+
+    def Paytable(self, ev):
+        self.model.paytable = PayTable(os.path.join(self.model.datadir, ev["ARGS"]["FILE"]))
+        for uic in self.model.units:
+            unit = self.model.units[uic]
+            for eid in unit.roster:
+                agt = unit.roster[eid]
+                agt.UpdateSalary(self.model.paytable.GetSalVal(agt.curloc, agt.grade, agt.paystep))
@@ -0,0 +1,192 @@
+import time
+import math
+import random
+import numpy as np
+import numpy.random as npr
+from statistics import NormalDist
+from Enterprise import *
+from BaseAgent import *
+
+##############################################################################
+# Standard output measures. Each takes a completed Enterprise model and
+# returns a single float for that replication.
+def MeanFillRate(model):
+    #Days a unit had no billets are recorded as NaN and left out
+    rates = [np.array(model.units[u].fillrate, dtype=float) for u in model.units]
+    return np.mean([np.nanmean(r) for r in rates if (~np.isnan(r)).any()])
+
+def TotalCivPay(model):
+    return float(np.sum([np.sum(model.units[u].civpay) for u in model.units]))
+
+def NumRetirements(model):
+    return float(sum([a.getweight() for a in model.deadpool if a.status == BaseAgent.AGT_STATUS["retired"]]))
+
+OUTPUTS = {"fillrate": MeanFillRate, "civpay": TotalCivPay, "retirements": NumRetirements}
+
+##############################################################################
+# RunEnterprise: Build, load and step a single seeded Enterprise replicate.
+def RunEnterprise(basedate, ndays, seed=None, **kwargs):
+    if seed is not None:
+        npr.seed(seed)
+        random.seed(seed)
+    model = Enterprise(basedate, **kwargs)
+    if seed is not None:
+        model.random.seed(seed)
+    model.LoadData()
+    for d in range(ndays):
+        model.step()
+    model.stages.Flush()
+    return model
+
+##############################################################################
+# tCDF: Student-t CDF for integer dof, from the finite series in
+# Abramowitz & Stegun 26.7.3-26.7.4.
+def tCDF(t, dof):
+    th = math.atan(abs(t) / math.sqrt(dof))
+    c2 = math.cos(th)**2
+    if dof % 2:
+        term, acc = 1.0, 1.0 if dof > 1 else 0.0
+        for k in range(3, dof - 1, 2):
+            term *= c2 * (k - 1) / k
+            acc += term
+        a = 2 / math.pi * (th + (math.sin(th) * math.cos(th) * acc if dof > 1 else 0.0))
+    else:
+        term, acc = 1.0, 1.0
+        for k in range(2, dof - 1, 2):
+            term *= c2 * (k - 1) / k
+            acc += term
+        a = math.sin(th) * acc
+    return 0.5 + math.copysign(a, t) / 2
+
+##############################################################################
+# tQuantile: Student-t quantile. Closed form for dof 1 and 2; otherwise a
+# Cornish-Fisher start about the normal quantile refined by Newton steps
+# on tCDF (agrees with scipy.stats.t.ppf to ~1e-12).
+def tQuantile(p, dof):
+    if dof < 1:
+        return float("inf")
+    dof = int(dof)
+    if dof == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if dof == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    z3 = z**3
+    z5 = z**5
+    z7 = z**7
+    t = (z + (z3 + z) / (4 * dof)
+           + (5*z5 + 16*z3 + 3*z) / (96 * dof**2)
+           + (3*z7 + 19*z5 + 17*z3 - 15*z) / (384 * dof**3))
+    lc = math.lgamma((dof + 1) / 2) - math.lgamma(dof / 2) - 0.5 * math.log(dof * math.pi)
+    for i in range(20):
+        pdf = math.exp(lc - (dof + 1) / 2 * math.log1p(t * t / dof))
+        step = (tCDF(t, dof) - p) / pdf
+        t -= step
+        if abs(step) < 1e-12 * max(1.0, abs(t)):
+            break
+    return t
+
+##############################################################################
+# CLASS:: ReplicationController
+#
+# Purpose: Launches Enterprise replicates in batches until the confidence
+#          interval half-width of every selected output falls below its
+#          target, then stops and reports the achieved precision.
+#
+# Targets are half-widths; with relative=True they are fractions of |mean|.
+class ReplicationController:
+    def __init__(self, basedate, ndays, outputs=None, targets=None, relative=True,
+                 confidence=0.95, batchsize=5, minreps=10, maxreps=200, seed=1, **kwargs):
+        self.basedate = basedate
+        self.ndays = ndays
+        self.outputs = outputs if outputs is not None else dict(OUTPUTS)
+        if targets is None:
+            targets = {k: 0.05 for k in self.outputs}
+        self.targets = targets
+        self.relative = relative
+        self.confidence = confidence
+        self.batchsize = batchsize
+        self.minreps = max(2, minreps)
+        self.maxreps = maxreps
+        self.seed = seed
+        self.modelargs = kwargs
+
+        #records
+        self.results = {k: [] for k in self.outputs}
+        self.cputimes = []
+        self.numreps = 0
+        self.converged = False
+
+    ############################################################################
+    #
+    def getresults(self): return self.results
+    def getnumreps(self): return self.numreps
+    def isConverged(self): return self.converged
+
+    ############################################################################
+    # RunReplicate: execute one seeded replicate and record each output
+    def RunReplicate(self):
+        t0 = time.process_time()
+        model = RunEnterprise(self.basedate, self.ndays, self.seed + self.numreps, **self.modelargs)
+        for k in self.outputs:
+            self.results[k].append(float(self.outputs[k](model)))
+        self.cputimes.append(time.process_time() - t0)
+        self.numreps += 1
+
+    ############################################################################
+    #
+    def Mean(self, k): return float(np.mean(self.results[k]))
+
+    def HalfWidth(self, k):
+        n = len(self.results[k])
+        if n < 2:
+            return float("inf")
+        s = np.std(self.results[k], ddof=1)
+        return tQuantile(0.5 + self.confidence / 2, n - 1) * s / math.sqrt(n)
+
+    def Target(self, k):
+        if self.relative:
+            return self.targets[k] * abs(self.Mean(k))
+        return self.targets[k]
+
+    def isPrecise(self, k):
+        return self.HalfWidth(k) <= self.Target(k)
+
+    ############################################################################
+    # Run: launch batches until every output meets its target or maxreps
+    def Run(self):
+        while self.numreps < self.maxreps:
+            nb = min(self.batchsize, self.maxreps - self.numreps)
+            for b in range(nb):
+                self.RunReplicate()
+            if self.numreps >= self.minreps and all(self.isPrecise(k) for k in self.targets):
+                self.converged = True
+                break
+        return self.Summary()
+
+    ############################################################################
+    # Summary: achieved precision per output, CPU used and the CPU saved
+    #          relative to always running maxreps replicates
+    def Summary(self):
+        cpu = float(np.sum(self.cputimes))
+        percpu = cpu / self.numreps if self.numreps else 0.0
+        summ = {"reps": self.numreps, "converged": self.converged,
+                "cputime": cpu, "cpusaved": percpu * (self.maxreps - self.numreps),
+                "outputs": {}}
+        for k in self.targets:
+            summ["outputs"][k] = {"mean": self.Mean(k), "halfwidth": self.HalfWidth(k),
+                                  "target": self.Target(k), "met": self.isPrecise(k)}
+        return summ
+
+    ############################################################################
+    #
+    def PrettyPrint(self):
+        summ = self.Summary()
+        print("Replications: ", summ["reps"], " of max ", self.maxreps)
+        print("\t Converged: ", summ["converged"])
+        print("\t  CPU time: %1.2fs"%(summ["cputime"]))
+        print("\t CPU saved: %1.2fs"%(summ["cpusaved"]))
+        for k in summ["outputs"]:
+            o = summ["outputs"][k]
+            print("\t %12s: %12.4f +/- %10.4f (target %10.4f) %s"%(k, o["mean"], o["halfwidth"],
+                                                               o["target"], "MET" if o["met"] else ""))
@@ -0,0 +1,98 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+from BaseAgent import *
+from PayTable import *
+
+##############################################################################
+# CLASS:: PayRepricer
+#
+# Purpose: Recomputes daily payroll of a completed run under alternative pay
+#          tables without re-simulating. Each employee's recorded
+#          grade/step/locality history (BaseAgent.payhist), roster dates and
+#          cohort weights become flat segment arrays once; repricing is then
+#          one table lookup and one cumulative sum per table.
+#
+# Day k follows Unit.RecordCivPay: record k is taken on model step k
+# (k = 0 at LoadData) and is annual salary / 260.
+class PayRepricer:
+    def __init__(self, model):
+        self.model = model
+        self.startdate = model.startdate
+        self.ndays = (model.date - model.startdate).days
+        self.uics = list(model.units.keys())
+        self.cmds = [model.units[u].cmdno for u in self.uics]
+        self.BuildSegments()
+
+    def DayIndex(self, date): return (date - self.startdate).days
+
+    ############################################################################
+    # BuildSegments: one row per (employee, constant pay and weight) span
+    def BuildSegments(self):
+        uidx = {u: i for (i, u) in enumerate(self.uics)}
+        agents = [a for a in self.model.schedule.agents if isinstance(a, BaseAgent)] + self.model.deadpool
+        K = self.ndays + 1
+        cols = {"unit": [], "grade": [], "step": [], "loc": [], "start": [], "end": [], "weight": []}
+        for agt in agents:
+            if agt.unit is None or agt.unit == "" or agt.unit.getuic() not in uidx:
+                continue
+            first = self.DayIndex(agt.startdate)
+            last = self.DayIndex(agt.exitdate) + 1 if agt.exitdate is not None else K
+            wh = getattr(agt, "weighthist", {agt.startdate: 1})
+            changes = sorted(set(list(agt.payhist.keys()) + list(wh.keys())))
+            pay = None
+            w = 1
+            spans = []
+            for d in changes:
+                if d in agt.payhist:
+                    pay = agt.payhist[d]
+                if d in wh:
+                    w = wh[d]
+                spans.append((max(first, self.DayIndex(d)), pay, w))
+            for (j, (k0, pay, w)) in enumerate(spans):
+                k1 = spans[j + 1][0] if j + 1 < len(spans) else last
+                k1 = min(k1, last)
+                if pay is None or k0 >= k1 or w == 0:
+                    continue
+                cols["unit"].append(uidx[agt.unit.getuic()])
+                cols["grade"].append(int(pay[0]))
+                cols["step"].append(int(pay[1]))
+                cols["loc"].append(pay[2])
+                cols["start"].append(k0)
+                cols["end"].append(k1)
+                cols["weight"].append(w)
+        self.seg = {c: np.array(cols[c]) for c in cols}
+
+    ############################################################################
+    # Salaries: segment salaries under each table, shape (tables, segments)
+    def Salaries(self, tables):
+        sals = []
+        for t in tables:
+            locs, arr = t.ToArray()
+            lidx = {l: i for (i, l) in enumerate(locs)}
+            missing = set(self.seg["loc"]) - set(lidx)
+            if missing:
+                raise ValueError("Pay table has no locality %s"%(", ".join(sorted(missing))))
+            li = np.array([lidx[l] for l in self.seg["loc"]], dtype=int)
+            sals.append(arr[li, self.seg["grade"] - 1, self.seg["step"] - 1])
+        return np.array(sals).reshape(len(tables), len(self.seg["unit"]))
+
+    ############################################################################
+    # Reprice: {name: DataFrame of daily payroll (dates x units)} for a dict
+    #          of alternative PayTables, all in a single pass
+    def Reprice(self, tables):
+        names = list(tables.keys())
+        T, U, K = len(names), len(self.uics), self.ndays + 1
+        daily = self.Salaries([tables[n] for n in names]) * self.seg["weight"] / 260
+        diff = np.zeros((T, U, K + 1))
+        for t in range(T):
+            np.add.at(diff[t], (self.seg["unit"], self.seg["start"]), daily[t])
+            np.add.at(diff[t], (self.seg["unit"], self.seg["end"]), -daily[t])
+        payroll = np.cumsum(diff, axis=2)[:, :, :K]
+        dates = [self.startdate + dt.timedelta(days=k) for k in range(K)]
+        return {n: pd.DataFrame(payroll[t].T, index=dates, columns=self.uics) for (t, n) in enumerate(names)}
+
+    ############################################################################
+    # ByCommand: sum a per-unit payroll frame into commands
+    def ByCommand(self, frame):
+        return frame.T.groupby(self.cmds).sum().T
@@ -0,0 +1,135 @@
+import math
+import numpy as np
+from bisect import bisect_left, bisect_right, insort
+import datetime as dt
+from BaseAgent import *
+from Unit import *
+from CohortAgent import *
+from CohortMarkov import RetirementStep
+
+##############################################################################
+# CLASS:: RotationForecast
+#
+# Purpose: Sorted index of projected billet openings, maintained
+#          incrementally as Unit.step extends, non-extends, assigns and
+#          releases employees. Projections follow the Unit.step dwell rules:
+#            deros    - OCONUS tour ends; opens if not extended at the first
+#                       extension review (probability NONEXT_PROB)
+#            decision - extended employee's next review; opens with
+#                       probability NONEXT_PROB
+#            release  - non-extended employee's release date
+#            retire   - retirement eligibility date
+#          Each entry is (date ordinal, seq, eid, kind); a global list and
+#          one list per unit are kept sorted for range queries. A cohort's
+#          retirements are projected per member, one entry per date.
+class RotationForecast:
+    def __init__(self, model):
+        self.model = model
+        self.A = int(math.ceil(Unit.DWELL_LIMIT["assigned"]))
+        self.E = int(math.ceil(Unit.DWELL_LIMIT["extended"]))
+        self.N = int(math.ceil(Unit.DWELL_LIMIT["nonextended"]))
+        self.index = []       #sorted entries, enterprise wide
+        self.byunit = {}      #uic -> sorted entries
+        self.entries = {}     #eid -> [(entry, uic, prob, weight, plns)]
+        self.agents = {}      #eid -> agent
+        self.seq = 0
+        for uic in model.units:
+            for eid in model.units[uic].roster:
+                self.Update(model.units[uic].roster[eid])
+
+    ############################################################################
+    # Project: [(date, kind, probability, weight, plns)] for an agent's next
+    #          openings
+    def Project(self, agt):
+        today = self.model.date
+        proj = []
+        p = Unit.NONEXT_PROB
+        w, plns = agt.getweight(), agt.getplns()
+        if agt.status == BaseAgent.AGT_STATUS["assigned"] and agt.DEROS is not None:
+            #Extension at the end of the tour, first review E-1 days later,
+            #then release N-E days after a non-extension
+            days = max(1, self.A - agt.dwell) + (self.E - 1) + (self.N - self.E)
+            proj.append((today + dt.timedelta(days=int(days)), "deros", p, w, plns))
+        elif agt.status == BaseAgent.AGT_STATUS["extended"]:
+            days = max(1, self.E - agt.dwell) + (self.N - self.E)
+            proj.append((today + dt.timedelta(days=int(days)), "decision", p, w, plns))
+        elif agt.status == BaseAgent.AGT_STATUS["nonextended"]:
+            proj.append((today + dt.timedelta(days=int(max(1, self.N - agt.dwell))), "release", 1.0, w, plns))
+        if agt.status == BaseAgent.AGT_STATUS["retired"]:
+            return proj
+        if isinstance(agt, CohortAgent):
+            proj += self.MemberRetirements(agt)
+        else:
+            proj.append((today + dt.timedelta(days=RetirementStep(agt, today)), "retire", 1.0, w, plns))
+        return proj
+
+    ############################################################################
+    # MemberRetirements: a cohort's retire entries from its members' own
+    #   SCD/DoB, following CohortAgent.CheckRetirement (strictly more than
+    #   20 years of service and 55 years of age)
+    def MemberRetirements(self, agt):
+        today = self.model.date.toordinal()
+        elig = np.maximum(np.maximum(agt.scd + 20 * 365 + 1, agt.dob + 55 * 365 + 1), today + 1)
+        proj = []
+        for d in np.unique(elig):
+            mask = elig == d
+            proj.append((dt.datetime.fromordinal(int(d)), "retire", 1.0, int(mask.sum()), list(agt.plns[mask])))
+        return proj
+
+    ############################################################################
+    # Update: re-project an agent after a status or dwell change
+    def Update(self, agt):
+        eid = agt.getUPI()
+        self.Remove(eid)
+        uic = agt.unit.getuic()
+        self.agents[eid] = agt
+        self.entries[eid] = []
+        for (d, kind, prob, w, plns) in self.Project(agt):
+            self.seq += 1
+            e = (d.toordinal(), self.seq, eid, kind)
+            insort(self.index, e)
+            insort(self.byunit.setdefault(uic, []), e)
+            self.entries[eid].append((e, uic, prob, w, plns))
+
+    ############################################################################
+    # Remove: drop an agent's projections (released, retired or moved)
+    def Remove(self, eid):
+        for (e, uic, prob, w, plns) in self.entries.pop(eid, []):
+            for lst in (self.index, self.byunit[uic]):
+                i = bisect_left(lst, e)
+                if i < len(lst) and lst[i] == e:
+                    lst.pop(i)
+        self.agents.pop(eid, None)
+
+    ############################################################################
+    # Query: projected openings in [start, end] (dates), optionally limited
+    #        to a unit, a command, a location ID and/or entry kinds
+    def Query(self, start, end, uic=None, cmd=None, loc=None, kinds=None):
+        lo, hi = start.toordinal(), end.toordinal()
+        if uic is None and cmd is None and loc is None:
+            lists = [self.index]
+        else:
+            units = self.model.units
+            lists = [self.byunit.get(u, []) for u in units
+                     if (uic is None or u == uic) and (cmd is None or units[u].cmdno == cmd)
+                     and (loc is None or units[u].getlocid() == loc)]
+        res = []
+        for lst in lists:
+            i = bisect_left(lst, (lo,))
+            j = bisect_right(lst, (hi, float("inf")))
+            for e in lst[i:j]:
+                if kinds is not None and e[3] not in kinds:
+                    continue
+                res.append(self.Describe(e))
+        res.sort(key=lambda r: r["date"])
+        return res
+
+    def Describe(self, e):
+        rec = [r for r in self.entries[e[2]] if r[0] == e][0]
+        return {"date": dt.datetime.fromordinal(e[0]), "kind": e[3], "eid": e[2],
+                "uic": rec[1], "plns": rec[4], "prob": rec[2], "weight": rec[3]}
+
+    ############################################################################
+    # ExpectedOpenings: probability- and weight-weighted count in a window
+    def ExpectedOpenings(self, start, end, **kwargs):
+        return sum([r["prob"] * r["weight"] for r in self.Query(start, end, **kwargs)])
@@ -0,0 +1,301 @@
+##############################################################################
+# Runner: command-line entry point for the model.
+#
+#   python Runner.py run        --days 365 [--cohorts] [--units daily]
+#   python Runner.py replicate  --days 365 --target fillrate=0.01
+#   python Runner.py sweep      --days 365 --nonext 0.05,0.10 --reps 5
+#   python Runner.py validate   [--datadir DIR]
+#   python Runner.py summarize  [--datadir DIR]
+#   python Runner.py equivalence --days 365 --engine cohort [--scale 20] [--seeds 10]
+#
+# Only the standard library is imported at start up. pandas, networkx, mesa
+# and the model modules are imported inside the commands that step the model,
+# so validate/summarize stay cheap for batch schedulers. Cold-start targets
+# (module load to command dispatch, checked with --timing) are listed in
+# STARTUP_TARGETS.
+##############################################################################
+import time
+_T0 = time.perf_counter()
+import os
+import sys
+import csv
+import argparse
+import itertools
+import tempfile
+import contextlib
+import datetime as dt
+from StagedScheduler import CADENCES
+
+STARTUP_TARGETS = {"validate": 0.05, "summarize": 0.05, "run": 0.05, "replicate": 0.05, "sweep": 0.05,
+                   "equivalence": 0.05}
+
+INPUTS = {"paytable":  ("2018-general-schedule-pay-rates.csv",
+                        ["LOCNAME", "GRADE"] + ["ANNUAL%d"%(i) for i in range(1, 11)]),
+          "locations": ("locations.csv", ["LOC", "GLC", "LMS", "OPP", "OCN", "ACT"]),
+          "orgs":      ("orgs.csv", ["UIC", "NID", "NAM", "LOC", "CMD"]),
+          "tdadata":   ("tdadata.csv", ["UIC", "UPN", "LOC", "PLN", "TYP", "AGD", "SER", "AMS", "OCN",
+                                        "EID", "LNM", "GRD", "STP", "FMS", "DWL", "FEX", "GEX", "SCD",
+                                        "AGE", "TIG"])}
+
+##############################################################################
+# ReadInput: rows of one input file as dicts (stdlib csv only)
+def ReadInput(datadir, name):
+    with open(os.path.join(datadir, INPUTS[name][0]), newline="") as fd:
+        return list(csv.DictReader(fd))
+
+def ReadNetVertices(file):
+    ids = set()
+    with open(file) as fd:
+        for f in fd:
+            flds = f.rstrip().replace('"','').split(" ")
+            if len(flds) == 5:
+                ids.add(int(flds[0]))
+    return ids
+
+def ParseDate(s): return dt.datetime.strptime(s, "%Y-%m-%d")
+
+##############################################################################
+# UsageError: a bad argument found inside a command; main reports it as an
+#             argparse error (usage message, exit status 2)
+class UsageError(Exception):
+    pass
+
+def CadenceList(s):
+    #Comma separated cadences for sweep
+    bad = [c for c in s.split(",") if c not in CADENCES]
+    if bad:
+        raise argparse.ArgumentTypeError("unknown cadence %s (choose from %s)"%(
+            ", ".join(bad), ", ".join(CADENCES)))
+    return s
+
+def ModelOptions(args):
+    return {"datadir": args.datadir, "cohorts": args.cohorts, "cadence": {"units": args.units}}
+
+##############################################################################
+# Validate: cross-check the input files without loading the model
+def Validate(datadir):
+    from Location import ParseLatLon
+    from modelenum import Functions, Regions
+    errs = []
+    data = {}
+    for name in INPUTS:
+        fname, cols = INPUTS[name]
+        if not os.path.exists(os.path.join(datadir, fname)):
+            errs.append("%s: missing"%(fname))
+            continue
+        data[name] = ReadInput(datadir, name)
+        if data[name]:
+            missing = [c for c in cols if c not in data[name][0]]
+            if missing:
+                errs.append("%s: missing columns %s"%(fname, ",".join(missing)))
+    if not os.path.exists(os.path.join(datadir, "command.net")):
+        errs.append("command.net: missing")
+    if errs:
+        return errs
+
+    locnames = set(r["LOCNAME"] for r in data["paytable"])
+    locids = set()
+    for r in data["locations"]:
+        locids.add(r["LOC"])
+        try:
+            ParseLatLon(r["GLC"])
+        except ValueError:
+            errs.append("locations.csv: LOC %s has bad GLC %s"%(r["LOC"], r["GLC"]))
+    nids = ReadNetVertices(os.path.join(datadir, "command.net"))
+    uics = set()
+    for r in data["orgs"]:
+        uics.add(r["UIC"])
+        if r["LOC"] not in locids:
+            errs.append("orgs.csv: %s has unknown LOC %s"%(r["UIC"], r["LOC"]))
+        if int(r["NID"]) not in nids:
+            errs.append("orgs.csv: %s has NID %s not in command.net"%(r["UIC"], r["NID"]))
+    funcs = set(f.value for f in Functions)
+    rgns = set(g.value for g in Regions)
+    seen = {"PLN": set(), "EID": set()}
+    staffed = set()
+    for (i, r) in enumerate(data["tdadata"]):
+        where = "tdadata.csv row %d (PLN %s)"%(i + 2, r["PLN"])
+        staffed.add(r["UIC"])
+        if r["UIC"] not in uics:
+            errs.append("%s: unknown UIC %s"%(where, r["UIC"]))
+        #Unit.TDA is keyed by PLN, so a repeat within a unit hides a billet
+        if (r["UIC"], r["PLN"]) in seen["PLN"]:
+            errs.append("%s: duplicate PLN in %s"%(where, r["UIC"]))
+        seen["PLN"].add((r["UIC"], r["PLN"]))
+        if r["EID"] == "VACANT":
+            continue
+        if r["EID"] in seen["EID"]:
+            errs.append("%s: duplicate EID %s"%(where, r["EID"]))
+        seen["EID"].add(r["EID"])
+        if r["LOC"] not in locnames:
+            errs.append("%s: locality %s not in pay table"%(where, r["LOC"]))
+        if not (1 <= int(r["GRD"]) <= 15) or not (1 <= int(r["STP"]) <= 10):
+            errs.append("%s: grade/step %s/%s out of range"%(where, r["GRD"], r["STP"]))
+        if not set(int(f) for f in r["FEX"].split("|")) <= funcs:
+            errs.append("%s: unknown FEX %s"%(where, r["FEX"]))
+        if not set(int(g) for g in r["GEX"].split("|")) <= rgns:
+            errs.append("%s: unknown GEX %s"%(where, r["GEX"]))
+    for uic in sorted(uics - staffed):
+        errs.append("orgs.csv: %s has no TDA rows"%(uic))
+    return errs
+
+##############################################################################
+# Commands
+def CmdValidate(args):
+    errs = Validate(args.datadir)
+    for e in errs:
+        print(e)
+    print("%d problem(s) found"%(len(errs)))
+    return 1 if errs else 0
+
+def CmdSummarize(args):
+    orgs = {r["UIC"]: r for r in ReadInput(args.datadir, "orgs")}
+    tda = ReadInput(args.datadir, "tdadata")
+    byunit = {}
+    for r in tda:
+        u = byunit.setdefault(r["UIC"], {"billets": 0, "filled": 0, "oconus": 0})
+        u["billets"] += 1
+        if r["EID"] != "VACANT":
+            u["filled"] += 1
+            u["oconus"] += int(r["OCN"])
+    bycmd = {}
+    print("%-9s %-10s %-9s %7s %7s %7s %6s"%("UIC", "NAME", "CMD", "BILLETS", "FILLED", "OCONUS", "FILL"))
+    for uic in sorted(byunit):
+        u = byunit[uic]
+        cmd = orgs[uic]["CMD"] if uic in orgs else "?"
+        name = orgs[uic]["NAM"] if uic in orgs else "?"
+        c = bycmd.setdefault(cmd, {"billets": 0, "filled": 0})
+        c["billets"] += u["billets"]
+        c["filled"] += u["filled"]
+        print("%-9s %-10s %-9s %7d %7d %7d %6.2f"%(uic, name, cmd, u["billets"], u["filled"],
+                                                u["oconus"], u["filled"] / u["billets"]))
+    print()
+    for cmd in sorted(bycmd):
+        c = bycmd[cmd]
+        print("%-9s %7d %7d %6.2f"%(cmd, c["billets"], c["filled"], c["filled"] / c["billets"]))
+    total = sum(u["billets"] for u in byunit.values())
+    filled = sum(u["filled"] for u in byunit.values())
+    print("TOTAL     %7d %7d %6.2f"%(total, filled, filled / total if total else 0.0))
+    return 0
+
+def CmdRun(args):
+    from Replication import RunEnterprise, OUTPUTS
+    model = RunEnterprise(ParseDate(args.date), args.days, args.seed, **ModelOptions(args))
+    for k in OUTPUTS:
+        print("%12s: %12.4f"%(k, OUTPUTS[k](model)))
+    return 0
+
+def CmdReplicate(args):
+    from Replication import ReplicationController, OUTPUTS
+    targets = {}
+    for t in args.target or ["%s=0.05"%(k) for k in OUTPUTS]:
+        k, sep, v = t.partition("=")
+        if k not in OUTPUTS:
+            raise UsageError("argument --target: unknown output '%s' (choose from %s)"%(k, ", ".join(OUTPUTS)))
+        try:
+            targets[k] = float(v)
+        except ValueError:
+            raise UsageError("argument --target: '%s' is not output=halfwidth"%(t))
+    rc = ReplicationController(ParseDate(args.date), args.days, targets=targets, relative=not args.absolute,
+                               batchsize=args.batch, minreps=args.minreps, maxreps=args.maxreps,
+                               seed=args.seed, **ModelOptions(args))
+    rc.Run()
+    rc.PrettyPrint()
+    return 0
+
+def CmdSweep(args):
+    import numpy as np
+    from Unit import Unit
+    from Replication import RunEnterprise, OUTPUTS
+    nonext = [float(v) for v in args.nonext.split(",")]
+    cadences = args.units.split(",")
+    print("%8s %9s %s"%("NONEXT", "UNITS", " ".join(["%14s"%(k) for k in OUTPUTS])))
+    for (p, cad) in itertools.product(nonext, cadences):
+        Unit.NONEXT_PROB = p
+        opts = {"datadir": args.datadir, "cohorts": args.cohorts, "cadence": {"units": cad}}
+        res = {k: [] for k in OUTPUTS}
+        for r in range(args.reps):
+            model = RunEnterprise(ParseDate(args.date), args.days, args.seed + r, **opts)
+            for k in OUTPUTS:
+                res[k].append(OUTPUTS[k](model))
+        print("%8.3f %9s %s"%(p, cad, " ".join(["%14.4f"%(np.mean(res[k])) for k in OUTPUTS])))
+    return 0
+
+def CmdEquivalence(args):
+    from Equivalence import EquivalenceHarness, ScaleInputs
+    with tempfile.TemporaryDirectory() as tmp:
+        datadir = args.datadir
+        if args.scale > 1:
+            datadir = ScaleInputs(args.datadir, tmp, args.scale)
+        h = EquivalenceHarness(ParseDate(args.date), args.days, optimized=args.engine,
+                               seed=args.seed, datadir=datadir, seeds=args.seeds)
+        #Keep the per-step model output out of the report
+        with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            h.Run()
+    h.PrettyPrint()
+    return 0 if h.report["equivalent"] else 1
+
+COMMANDS = {"run": CmdRun, "replicate": CmdReplicate, "sweep": CmdSweep,
+            "validate": CmdValidate, "summarize": CmdSummarize, "equivalence": CmdEquivalence}
+
+##############################################################################
+#
+def BuildParser():
+    parser = argparse.ArgumentParser(prog="Runner.py", description="Overseas rotation model")
+    parser.add_argument("--datadir", default=".", help="directory holding the input files")
+    parser.add_argument("--timing", action="store_true", help="report start-up time against its target")
+    #--datadir is also accepted after the command; SUPPRESS keeps the
+    #top-level value unless it is given there
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--datadir", default=argparse.SUPPRESS, help="directory holding the input files")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    def ModelArgs(p, sweep=False):
+        p.add_argument("--date", default="2018-01-01", help="model start date YYYY-MM-DD")
+        p.add_argument("--days", type=int, default=365)
+        p.add_argument("--seed", type=int, default=1)
+        p.add_argument("--cohorts", action="store_true", help="compress interchangeable employees")
+        if sweep:
+            p.add_argument("--units", default="weekly", type=CadenceList,
+                           help="comma separated unit cadences (%s)"%(", ".join(CADENCES)))
+        else:
+            p.add_argument("--units", default="weekly", choices=list(CADENCES), help="unit cadence")
+
+    ModelArgs(sub.add_parser("run", parents=[common], help="run one replicate"))
+    p = sub.add_parser("replicate", parents=[common], help="replicate until outputs reach target precision")
+    ModelArgs(p)
+    p.add_argument("--target", action="append", help="output=halfwidth, e.g. fillrate=0.01")
+    p.add_argument("--absolute", action="store_true", help="targets are absolute half-widths")
+    p.add_argument("--batch", type=int, default=5)
+    p.add_argument("--minreps", type=int, default=10)
+    p.add_argument("--maxreps", type=int, default=200)
+    p = sub.add_parser("sweep", parents=[common], help="grid of non-extension probability x unit cadence")
+    ModelArgs(p, sweep=True)
+    p.add_argument("--nonext", default="0.05", help="comma separated non-extension probabilities")
+    p.add_argument("--reps", type=int, default=5)
+    p = sub.add_parser("equivalence", parents=[common], help="compare an optimized engine with the reference engine")
+    p.add_argument("--date", default="2018-01-01", help="model start date YYYY-MM-DD")
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--engine", default="cohort", help="engine name from Equivalence.ENGINES")
+    p.add_argument("--scale", type=int, default=1, help="replicate the TDA this many times (ScaleInputs)")
+    p.add_argument("--seeds", type=int, default=1,
+                   help="compare mean traces over this many seeds instead of one trace (stochastic engines)")
+    sub.add_parser("validate", parents=[common], help="check the input files")
+    sub.add_parser("summarize", parents=[common], help="summarize the TDA by unit and command")
+    return parser
+
+def main(argv=None):
+    parser = BuildParser()
+    args = parser.parse_args(argv)
+    if args.timing:
+        startup = time.perf_counter() - _T0
+        print("start-up %1.4fs (target %1.4fs)"%(startup, STARTUP_TARGETS[args.command]), file=sys.stderr)
+    try:
+        return COMMANDS[args.command](args)
+    except UsageError as e:
+        parser.error(str(e))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+##############################################################################
+# Cadences: predicates on the model date deciding whether a stage runs.
+CADENCES = {"daily":    lambda d: True,
+            "business": lambda d: d.weekday() < 5,
+            "weekly":   lambda d: d.weekday() == 0,
+            "monthly":  lambda d: d.day == 1}
+
+##############################################################################
+# CLASS:: Stage
+#
+# Purpose: One registered component of the model step.
+class Stage:
+    def __init__(self, name, func, cadence, phase, startdate, order):
+        if cadence not in CADENCES:
+            raise ValueError("Unknown cadence '%s' for stage %s"%(cadence, name))
+        self.name = name
+        self.func = func
+        self.cadence = cadence
+        self.phase = phase
+        self.order = order
+        self.lastrun = startdate
+        self.numruns = 0
+
+    def isDue(self, date): return CADENCES[self.cadence](date)
+
+##############################################################################
+# CLASS:: StagedScheduler
+#
+# Purpose: Runs model components at their own cadence, in phase order.
+#          Each stage is called as func(elapsed) with the number of model days
+#          since it last ran, so coarse stages can catch up on the days they
+#          skipped.
+class StagedScheduler:
+    def __init__(self, model):
+        self.model = model
+        self.stages = {}
+
+    ############################################################################
+    #
+    def Register(self, name, func, cadence="daily", phase=0):
+        self.stages[name] = Stage(name, func, cadence, phase, self.model.date, len(self.stages))
+
+    def SetCadence(self, name, cadence):
+        if cadence not in CADENCES:
+            raise ValueError("Unknown cadence '%s' for stage %s"%(cadence, name))
+        self.stages[name].cadence = cadence
+
+    def getstages(self):
+        return sorted(self.stages.values(), key=lambda s: (s.phase, s.order))
+
+    ############################################################################
+    # RunStage: call a stage with the days elapsed since its last run
+    def RunStage(self, stage):
+        elapsed = (self.model.date - stage.lastrun).days
+        if elapsed > 0:
+            stage.func(elapsed)
+            stage.lastrun = self.model.date
+            stage.numruns += 1
+
+    ############################################################################
+    #
+    def step(self):
+        for stage in self.getstages():
+            if stage.isDue(self.model.date):
+                self.RunStage(stage)
+
+    ############################################################################
+    # Flush: bring every stage up to the current date (e.g. at end of a run)
+    def Flush(self):
+        for stage in self.getstages():
+            self.RunStage(stage)
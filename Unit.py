@@ -1,7 +1,7 @@
 from mesa import Agent, Model
+import math
 import datetime as dt
 import numpy as np
-import pandas as pd
 from Billet import *
 from modelenum import *
 from BaseAgent import *
@@ -12,18 +12,29 @@ from BaseAgent import *
 #  Purpose: Implements a generic agent in an organization.
 # Requires: CMD, UIC, NAM       
 class Unit(Agent):
+    #Dwell (days) at which each status is reviewed, and the chance an
+    #extended employee is not extended again at review
+    DWELL_LIMIT = {"assigned":3*365, "extended":1.5*365, "nonextended":2*365}
+    NONEXT_PROB = 0.05
+    
     def __init__(self,uid,model,**kwargs):
         super().__init__(uid, model)
         self.cmdno = kwargs["CMD"]
         self.uic = kwargs["UIC"]
         self.name = kwargs["NAM"]
+        self.locid = kwargs.get("LOC")     #Location ID of the unit
+        self.nid = kwargs.get("NID")       #Node ID in the chain of command
         #Default values to be set later
         d = np.random.normal(0.5,0.05)
         self.unitpolicy = {"funcexp":d, "geoexp":(1-d)}
         self.agg_funcexp = FuncSkillSet() #Aggregated Functional Experience
         self.agg_geoexp  = RgnlSkillSet() #Aggregated Regional Experience
         self.TDA = {}
+        self.tdadates = []   #Date each billet was added, in TDA order
         self.roster = {}
+        self.cohorts = []    #CohortAgents created at load (cohort mode)
+        self.geofocus = []
+        self.reqskills = []
         self.vacann = []
         self.civpay = []
         self.fillrate = []
@@ -35,6 +46,8 @@ class Unit(Agent):
     def gethiringpol(self): return self.unitpolicy 
     def getname(self): return self.name
     def getuic(self): return self.uic
+    def getlocid(self): return self.locid
+    def getnid(self): return self.nid
     
     def setgeofocus(self,v): self.geofocus = v
     def setreqskills(self,v): self.reqskills = v
@@ -51,6 +64,8 @@ class Unit(Agent):
         # Requires: UPN, AMS, AGD, ASR, KEY, OCC, LOC
         b = Billet(**kwargs)
         self.TDA[kwargs["PLN"]] = b
+        self.tdadates.append(self.model.date)
+        self.model.billets.Add(b, kwargs["PLN"], self.uic)
         if kwargs["OCC"] is not None:
             kwargs["OCC"].PLN = kwargs["PLN"]
             self.AssignEmployee(kwargs["PLN"],kwargs["OCC"])
@@ -59,37 +74,106 @@ class Unit(Agent):
     #
     def AssignEmployee(self,paraln,empagt):
         eid = empagt.getUPI()
-        self.TDA[paraln].occupant = eid
+        self.TDA[paraln].Fill(eid)
         self.roster[eid] = empagt
+        self.UpdateForecast(eid)
                        
+    ############################################################################  
+    # AssignCohort: Place every member of a CohortAgent in their billet
+    def AssignCohort(self,cohort):
+        for (paraln, eid) in zip(cohort.plns, cohort.eids):
+            self.TDA[paraln].Fill(eid)
+        self.roster[cohort.getUPI()] = cohort
+        self.UpdateForecast(cohort.getUPI())
+    
     ############################################################################  
     #
-    def ReleaseEmployee(self,eid):
-        #Remove agent from the schedule
-        self.model.RemoveAgent(self.roster[eid])
-        paraln = self.roster[eid].PLN
-        self.TDA[paraln].Vacate()
+    def ReleaseEmployee(self,eid,date=None):
+        #Remove agent from the schedule, leaving on date (default today)
+        self.model.RemoveAgent(self.roster[eid],date)
+        for paraln in self.roster[eid].getplns():
+            self.TDA[paraln].Vacate()
         self.roster.pop(eid)
+        if self.model.forecast is not None:
+            self.model.forecast.Remove(eid)
     
     ############################################################################  
     #
-    def ExtendEmployee(self,eid):
+    def ExtendEmployee(self,eid,over=0):
         self.roster[eid].status = BaseAgent.AGT_STATUS["extended"]
-        #reset dwell time to 1 and adjust DEROS by 2 years
-        self.roster[eid].dwell = 1
+        #reset dwell time to 1 (plus any days served past the review date
+        #when the unit steps less than daily) and adjust DEROS by 2 years
+        self.roster[eid].dwell = 1 + over
         self.roster[eid].DEROS = self.roster[eid].DEROS - dt.timedelta(days=(2*365))
+        self.UpdateForecast(eid)
+        
+    ############################################################################  
+    # UpdateForecast: re-project an employee's openings after a change
+    def UpdateForecast(self,eid):
+        if self.model.forecast is not None:
+            self.model.forecast.Update(self.roster[eid])
+        
+    ############################################################################  
+    # SplitNonExtended: Extension review for a cohort; the members drawn for
+    #                   non-extension are split off into their own cohort
+    def SplitNonExtended(self,eid,over=0):
+        agt = self.roster[eid]
+        w = agt.getweight()
+        nnon = np.random.binomial(w, Unit.NONEXT_PROB)
+        if nnon == w:
+            agt.status = BaseAgent.AGT_STATUS["nonextended"]
+            self.UpdateForecast(eid)
+            return
+        if nnon > 0:
+            mask = np.zeros(w, dtype=bool)
+            mask[np.random.choice(w, nnon, replace=False)] = True
+            new = agt.Split(mask)
+            new.status = BaseAgent.AGT_STATUS["nonextended"]
+            self.UpdateForecast(new.getUPI())
+        self.ExtendEmployee(eid,over)
         
+    ############################################################################  
+    # DaysOnRoster: first of the last `days` days, and how many of them each
+    #               roster entry was on the roster; a retiree or release is
+    #               still counted on the day it left (its statusdate)
+    def DaysOnRoster(self,days):
+        first = self.model.date - dt.timedelta(days=days - 1)
+        ondays = {}
+        for eid in self.roster:
+            agt = self.roster[eid]
+            if agt.status in (BaseAgent.AGT_STATUS["retired"], BaseAgent.AGT_STATUS["released"]):
+                ondays[eid] = min(days, max(0, (agt.statusdate - first).days + 1))
+            else:
+                ondays[eid] = days
+        return first, ondays
+    
     ############################################################################  
     #
-    def RecordCivPay(self):
-        daypay = pd.Series([self.roster[eid].getsalary() for eid in self.roster]).sum()
+    def RecordCivPay(self,days=1):
+        first, ondays = self.DaysOnRoster(days)
+        daypay = np.zeros(days)
+        for eid in self.roster:
+            n = ondays[eid]
+            daypay[:n] += self.roster[eid].getdailysalary(first, n) * self.roster[eid].getweight()
         #get average daily by dividing by 260
-        self.civpay.append(daypay / 260)
+        self.civpay.extend(list(daypay / 260))
     
     ############################################################################  
     #
-    def RecordFillRate(self):
-        self.fillrate.append( len(self.roster) / len(self.TDA) )
+    def RecordFillRate(self,days=1):
+        first, ondays = self.DaysOnRoster(days)
+        filled = np.zeros(days)
+        for eid in self.roster:
+            filled[:ondays[eid]] += self.roster[eid].getweight()
+        #Billets count from the day they were added; a unit added mid-run
+        #has no fill rate before its first billet
+        nbillets = np.full(days, float(len(self.TDA)))
+        for d in reversed(self.tdadates):
+            k = (d - first).days
+            if k <= 0:
+                break
+            nbillets[:min(k, days)] -= 1
+        self.fillrate.extend(list(np.where(nbillets > 0, filled / np.maximum(nbillets, 1), np.nan)))
     
     ############################################################################  
     #
@@ -115,52 +199,53 @@ class Unit(Agent):
     
         
     ############################################################################  
-    #
-    def step(self):
+    # Overshoot: days a review fell past its dwell limit, at most the days
+    #            since the unit last stepped
+    def Overshoot(self,eid,status,elapsed):
+        return max(0, min(elapsed - 1, self.roster[eid].dwell - math.ceil(Unit.DWELL_LIMIT[status])))
+        
+    ############################################################################  
+    # step: elapsed is the number of days since the unit last stepped. Agents
+    #       date their own retirement or release, so each skipped day is
+    #       recorded with that day's roster and salaries, and leavers exit
+    #       on the day they left.
+    def step(self,elapsed=1):
         #print("Unit::Step")
-        #record stats at begining of day...
-        self.RecordCivPay()
-        self.RecordFillRate()
+        #record stats at begining of each day...
+        self.RecordCivPay(elapsed)
+        self.RecordFillRate(elapsed)
         
-        #Should check for weekend here... only work M-F...
-        '''
-        for slot in self.TDA: 
-            if self.TDA[slot].occupant is None:
-                # Move to fill vacancy
-                rpa_dict = {"GEX":self.geofocus, "GEXWGHTS":[0],
-                            "FEX":self.reqskills, "FEXWGHTS":[0],
-                            "UNIT":self, "BILLET":self.TDA[slot], 
-                            "LOC":self.TDA[slot].getloc()}
-                print("\t\t Vacancy Announcement")
-                self.vacann.append( self.model.jobboard.Advertise(**rpa_dict) )
-        '''
+        #Vacancies are posted in one batch per tick by Enterprise.PostVacancies
         cur_emps = list(self.roster.keys())
         for eid in cur_emps:
             if self.roster[eid].status == BaseAgent.AGT_STATUS["retired"]:
                 print("Employee Retiring: ", self.roster[eid].lastname, " EID: ",eid, " PARALN: ",self.roster[eid].PLN)
                 #Remove from unit
-                self.ReleaseEmployee(eid)
+                self.ReleaseEmployee(eid,self.roster[eid].statusdate)
             elif self.roster[eid].status == BaseAgent.AGT_STATUS["assigned"]:
                 if self.roster[eid].DEROS is not None:
-                    if self.roster[eid].dwell >= (3*365):
+                    if self.roster[eid].dwell >= Unit.DWELL_LIMIT["assigned"]:
                         print("Extending Employee: ", self.roster[eid].lastname, " EID: ",eid)
-                        self.ExtendEmployee(eid)
+                        self.ExtendEmployee(eid,self.Overshoot(eid,"assigned",elapsed))
                 else:
                     #CONUS Employee... no need for anything now
                     pass
             elif self.roster[eid].status == BaseAgent.AGT_STATUS["extended"]:
                 #Only if an OCONUS Assignment
-                if self.roster[eid].dwell >= (1.5*365):
-                    if np.random.rand() > 0.05:
-                        self.ExtendEmployee(eid)
+                if self.roster[eid].dwell >= Unit.DWELL_LIMIT["extended"]:
+                    over = self.Overshoot(eid,"extended",elapsed)
+                    if self.roster[eid].getweight() > 1:
+                        self.SplitNonExtended(eid,over)
+                    elif np.random.rand() > Unit.NONEXT_PROB:
+                        self.ExtendEmployee(eid,over)
                         print("Extending Employee ",eid," Again")
                     else:
-                        self.roster[eid].status = BaseAgent.AGT_STATUS["nonextended"]       
-            elif self.roster[eid].status == BaseAgent.AGT_STATUS["nonextended"]:
-                if self.roster[eid].dwell >= (2*365):
-                    print("Releasing Employee ",eid)
-                    self.roster[eid].status = BaseAgent.AGT_STATUS["released"]
-                    self.ReleaseEmployee(eid)
+                        self.roster[eid].status = BaseAgent.AGT_STATUS["nonextended"]
+                        self.UpdateForecast(eid)
+            elif self.roster[eid].status == BaseAgent.AGT_STATUS["released"]:
+                #Dwell reached the non-extended limit (BaseAgent.CheckRelease)
+                print("Releasing Employee ",eid)
+                self.ReleaseEmployee(eid,self.roster[eid].statusdate)
                 
             #else:
                     #if (date + 240) >= deros and (dwell > 360):
@@ -18,14 +18,74 @@ class Functions(Enum):
     Rqmnts = auto()
     
 
+##############################################################################
+# Experience: skill values adjusted once per model day at a per-skill rate.
+#   Between assignment changes the daily update is deterministic, so values
+#   are stored as (base values, day they were valid, active rates) and
+#   evaluated in closed form only when read through .experience. clock
+#   returns the current model day number; without one, SetRates applies a
+#   single daily adjustment immediately.
 class Experience:
-    def __init__(self):
-        self.experience = {}
+    def __init__(self,clock=None):
+        self.base = {}      #Skill values as of day asof
+        self.rates = {}     #Daily rate per skill for the current assignment
+        self.asof = None
+        self.clock = clock
+    
+    @property
+    def experience(self):
+        self.Materialize()
+        return self.base
+    
+    @staticmethod
+    def Evolve(v,rate,n):
+        #Closed form of n daily adjustSkill updates at rate
+        if n <= 0:
+            return v
+        floor = abs(rate)
+        #First day exactly as adjustSkill (handles 0 and sub-floor values)
+        if v == 0:
+            v = floor
+        else:
+            v = max(v * (1 + rate), floor)
+        v = v * (1 + rate)**(n - 1)
+        return max(v, floor) if rate < 0 else v
+    
+    def Materialize(self,upto=None):
+        if self.clock is None or self.asof is None:
+            return
+        upto = self.clock() if upto is None else upto
+        n = upto - self.asof
+        if n <= 0:
+            return
+        for kw in self.rates:
+            self.base[kw] = Experience.Evolve(self.base[kw], self.rates[kw], n)
+        self.asof = upto
+    
+    def SetRates(self,rates):
+        #Rates apply once per day from today until changed
+        if self.clock is None:
+            for kw in rates:
+                self.adjustSkill(kw, rates[kw])
+            return
+        if rates == self.rates:
+            return
+        now = self.clock()
+        if self.asof is None:
+            self.asof = now - 1
+        self.Materialize(now - 1)
+        self.rates = dict(rates)
+    
+    def CopyFrom(self,other):
+        self.base = dict(other.experience)
+        self.rates = dict(other.rates)
+        self.asof = other.asof
+        
     def incSkill(self,kw): 
         pass
     def decSkill(self,kw): 
         pass
-    def add(self,exp):
+    def add(self,exp,w=1):
         pass
     def subtract(self,exp): 
         pass     
@@ -54,8 +114,8 @@ class Experience:
         print("\t\t",skl)
         
 class FuncSkillSet(Experience):
-    def __init__(self):
-        super().__init__()
+    def __init__(self,clock=None):
+        super().__init__(clock)
         self.incrate = 0.002
         self.decrate = -0.002
         self.keys = []
@@ -70,17 +130,17 @@ class FuncSkillSet(Experience):
     def incSkill(self,kw): self.adjustSkill(kw,self.incrate)   
     def decSkill(self,kw): self.adjustSkill(kw,self.decrate)
         
-    def add(self,fexp):
+    def add(self,fexp,w=1):
         for f in Functions:
-            self.experience[f.name] += fexp.experience[f.name]
+            self.experience[f.name] += w * fexp.experience[f.name]
             
     def subtract(self,fexp):
         for f in Functions: 
             self.experience[f.name] -= fexp.experience[f.name]
         
 class RgnlSkillSet(Experience):
-    def __init__(self,):
-        super().__init__()
+    def __init__(self,clock=None):
+        super().__init__(clock)
         self.incrate = 0.002
         self.decrate = -0.002
         self.keys = []
@@ -95,9 +155,9 @@ class RgnlSkillSet(Experience):
     def incSkill(self,kw): self.adjustSkill(kw,self.incrate)
     def decSkill(self,kw): self.adjustSkill(kw,self.decrate)
     
-    def add(self,rexp):
+    def add(self,rexp,w=1):
         for r in Regions: 
-            self.experience[r.name] += rexp.experience[r.name]
+            self.experience[r.name] += w * rexp.experience[r.name]
     
     def subtract(self,rexp):
         for r in Regions: 